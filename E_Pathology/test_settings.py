@@ -0,0 +1,20 @@
+from .settings import *
+
+# The test suite runs on SQLite unless DATABASE_URL points it at a real server.
+DATABASES = {
+    'default': dj_database_url.config(
+        default='sqlite:///' + os.path.join(BASE_DIR, 'test.sqlite3')
+    )
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+# one process, so the cache need not be shared
+SILENCED_SYSTEM_CHECKS = ['store.W001']
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+SMS_BACKEND = 'store.sms.LocmemTransport'
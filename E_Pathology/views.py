@@ -2,7 +2,9 @@ from django.conf import settings
 from django.shortcuts import render, redirect
 from django.urls import reverse
 from django.contrib.admin.sites import site
-from store.models import Subscribe
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from store import subscriptions
 
 
 def home_page(request):
@@ -39,9 +41,9 @@ def home_page(request):
 def subscription_page(request):
     context = {}
     if request.method == 'POST':
-        input_name = request.POST.get('name')
-        input_email = request.POST.get('email')
-        if input_name or input_email == '':
+        input_name = request.POST.get('name', '').strip()
+        input_email = request.POST.get('email', '').strip()
+        if not input_name or not input_email:
             return render(
                 request,
                 'errors.html',
@@ -51,16 +53,20 @@ def subscription_page(request):
                     'subscribe': reverse('subscribe')
                 }
             )
-        queryset = Subscribe.objects.values('email')
-        emails_list = []
-        for dictn in queryset:
-            emails_list.append(dictn['email'])
-
-        if input_email not in emails_list:
-            Subscribe.objects.create(
-                name=input_name,
-                email=input_email
+        try:
+            validate_email(input_email)
+        except ValidationError:
+            return render(
+                request,
+                'errors.html',
+                {
+                    'errors': 'Please enter a valid Email.',
+                    'name': 'Blank Subscription',
+                    'subscribe': reverse('subscribe')
+                }
             )
+
+        if subscriptions.subscribe(input_name, input_email):
             return redirect('home')
         else:
             return render(
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+
+UserModel = get_user_model()
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR') if request is not None else None
+
+
+def failure_keys(ip=None, user_id=None):
+    keys = {}
+    if ip:
+        keys[f'core:login-failures:ip:{ip}'] = settings.LOGIN_MAX_FAILURES_PER_IP
+    if user_id is not None:
+        keys[f'core:login-failures:user:{user_id}'] = settings.LOGIN_MAX_FAILURES_PER_ACCOUNT
+    return keys
+
+
+def is_blocked(ip=None, user_id=None):
+    keys = failure_keys(ip, user_id)
+    failures = cache.get_many(keys)
+    return any(failures.get(key, 0) >= limit for key, limit in keys.items())
+
+
+def record_failure(ip=None, user_id=None):
+    for key in failure_keys(ip, user_id):
+        # the window starts at the first failure, later ones do not extend it
+        cache.add(key, 0, timeout=settings.LOGIN_FAILURE_WINDOW)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # expired between add and incr
+            cache.add(key, 1, timeout=settings.LOGIN_FAILURE_WINDOW)
+
+
+def reset_failures(user_id):
+    cache.delete_many(failure_keys(user_id=user_id))
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    # Signs in with the username or the email in one query on their unique indexes.
+    # Failed attempts are counted per client IP and per account, and once either
+    # is over its limit the attempt is refused before the password is hashed.
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        ip = client_ip(request)
+        if is_blocked(ip=ip):
+            raise PermissionDenied
+        users = list(UserModel._default_manager.filter(Q(username=username) | Q(email=username))[:2])
+        # a username that is also someone else's email belongs to its own account
+        user = next((user for user in users if user.username == username), users[0] if users else None)
+
+        if user is None:
+            # hash anyway, so unknown accounts take as long as wrong passwords
+            UserModel().set_password(password)
+            record_failure(ip=ip)
+            return None
+        if is_blocked(user_id=user.pk):
+            raise PermissionDenied
+        if user.check_password(password) and self.user_can_authenticate(user):
+            reset_failures(user.pk)
+            return user
+        record_failure(ip=ip, user_id=user.pk)
+        return None
@@ -1,25 +1,7 @@
 import datetime
 from django.contrib.auth import login
-from django.core.exceptions import ValidationError
-from django.core.validators import validate_email
 from django.shortcuts import redirect, render
 
-from .models import User
-
-
-def is_email_validated(email):
-    try:
-        validate_email(email)
-    except ValidationError:
-        return False
-    else:
-        return True
-
-
-def get_username_of_this(email):
-    user = User.objects.get(email=email)
-    return user.username
-
 
 def redirect_to_home_or_next_url(next_url):
     if next_url is not None:
@@ -39,6 +21,13 @@ def login_user_or_show_error_page(request, user):
         })
 
 
+def show_too_many_attempts_page(request):
+    return render(request, 'errors.html', {
+        'errors': 'Too Many Failed Logins. Please Try Again Later.',
+        'name': 'Login'
+    }, status=429)
+
+
 def calculate_age(birth_date):
     today = datetime.date.today()
     try:
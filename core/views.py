@@ -6,14 +6,14 @@ from django.contrib.auth import authenticate, logout
 from rest_framework.renderers import AdminRenderer
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.mixins import RetrieveModelMixin, UpdateModelMixin, ListModelMixin
-from twilio.rest import Client
 
 
+from .backends import client_ip, is_blocked
 from .permissions import IsAdminOrReadOnly, IsAuthenticatedOrReadOnly
 from .forms import UserCreationForm
 from .models import User
 from .serializers import UserProfileSerializer
-from .tests import is_email_validated, get_username_of_this, login_user_or_show_error_page
+from .tests import login_user_or_show_error_page, show_too_many_attempts_page
 
 
 def register_user(request):
@@ -48,16 +48,11 @@ def login_user(request):
     }
 
     if request.method == 'POST':
-        user_name_or_email = request.POST.get('username')
-        password = request.POST.get('password')
-        if is_email_validated(user_name_or_email):
-            username = get_username_of_this(user_name_or_email)
-            user = authenticate(request, username=username, password=password)
-            return login_user_or_show_error_page(request, user)
-        else:
-            username = user_name_or_email
-            user = authenticate(request, username=username, password=password)
-            return login_user_or_show_error_page(request, user)
+        # the backend takes either the username or the email
+        user = authenticate(request, username=request.POST.get('username'), password=request.POST.get('password'))
+        if user is None and is_blocked(ip=client_ip(request)):
+            return show_too_many_attempts_page(request)
+        return login_user_or_show_error_page(request, user)
     return render(request, 'login.html', context=context)
 
 
@@ -0,0 +1,157 @@
+"""
+Load test of the patient journey, against a server seeded with
+`python manage.py seed_loadtest`:
+
+    locust -f locustfiles/patient_journey.py --headless -u 200 -r 20 -t 10m \
+        --host http://localhost:8000 --csv results/patient_journey
+
+--csv writes <prefix>_stats.csv with the request count, throughput and the
+50/95/99th percentile latency of every endpoint named below.
+"""
+import random
+import re
+
+from locust import HttpUser, task, between
+
+PATIENT_USERNAME = 'loadtest-{}'
+PATIENT_PASSWORD = 'loadtest-password'
+PATIENTS = 100
+SEARCH_TERMS = ['thyroid', 'hba1c', 'lipid', 'blood', 'vitamin', 'liver', 'kidney', 'urine']
+
+TEST_ID = re.compile(r'/store/tests/(\d+)')
+DOCTOR_ID = re.compile(r'/store/doctors/(\d+)/schedule/')
+PAYABLE_ORDER_ID = re.compile(r'/store/orders/(\d+)/payment/')
+PAYABLE_CHECKUP_ID = re.compile(r'/store/checkups/(\d+)/payment/')
+REPORT_ID = re.compile(r'/store/reports/(\d+)')
+
+
+class CatalogVisitor(HttpUser):
+    # Anonymous visitors browse and search the catalog.
+    weight = 3
+    wait_time = between(1, 5)
+
+    def on_start(self):
+        self.test_ids = []
+        self.doctor_ids = []
+        self.etags = {}
+
+    def get_catalog(self, url, name=None):
+        # revalidate pages seen before, like a browser does; unchanged ones come back as
+        # an empty 304, which shows up in the "Average Content Size" column
+        headers = {'If-None-Match': self.etags[url]} if url in self.etags else {}
+        response = self.client.get(url, headers=headers, name=name)
+        if 'ETag' in response.headers:
+            self.etags[url] = response.headers['ETag']
+        return response
+
+    @task(4)
+    def browse_tests(self):
+        page = random.randint(1, 20)
+        response = self.get_catalog(f"/store/tests/?page={page}", name='/store/tests/?page')
+        self.test_ids = TEST_ID.findall(response.text) or self.test_ids
+
+    @task(4)
+    def search_tests(self):
+        term = random.choice(SEARCH_TERMS)
+        self.get_catalog(f"/store/tests/?search={term}", name='/store/tests/?search')
+
+    @task(4)
+    def autocomplete(self):
+        # one request per keystroke, as the search box sends them
+        term = random.choice(SEARCH_TERMS)
+        for length in range(2, len(term) + 1):
+            self.client.get(f"/store/autocomplete/?q={term[:length]}", name='/store/autocomplete/?q')
+
+    @task(2)
+    def view_test(self):
+        if self.test_ids:
+            test_id = random.choice(self.test_ids)
+            self.get_catalog(f"/store/tests/{test_id}/", name='/store/tests/:id')
+
+    @task(1)
+    def browse_collections(self):
+        self.get_catalog('/store/collections/')
+
+    @task(2)
+    def browse_doctors(self):
+        response = self.get_catalog('/store/doctors/')
+        self.doctor_ids = DOCTOR_ID.findall(response.text) or self.doctor_ids
+
+    @task(1)
+    def view_schedule(self):
+        if self.doctor_ids:
+            doctor_id = random.choice(self.doctor_ids)
+            self.client.get(f"/store/doctors/{doctor_id}/schedule/", name='/store/doctors/:id/schedule')
+
+
+class Patient(HttpUser):
+    # Seeded patients log in, order and pay for tests, book checkups and
+    # download their reports.
+    weight = 1
+    wait_time = between(2, 8)
+
+    def on_start(self):
+        self.test_ids = []
+        self.doctor_ids = []
+        self.client.get('/auth/login/')
+        self.client.post(
+            '/auth/login/',
+            {
+                'username': PATIENT_USERNAME.format(random.randrange(PATIENTS)),
+                'password': PATIENT_PASSWORD,
+                'csrfmiddlewaretoken': self.client.cookies.get('csrftoken'),
+            },
+            name='/auth/login/ [POST]'
+        )
+
+    def post(self, url, data, name):
+        # SessionAuthentication checks the CSRF token on every unsafe request
+        return self.client.post(
+            url,
+            data,
+            headers={'X-CSRFToken': self.client.cookies.get('csrftoken', '')},
+            name=name
+        )
+
+    @task(3)
+    def browse_and_search(self):
+        term = random.choice(SEARCH_TERMS)
+        response = self.client.get(f"/store/tests/?search={term}", name='/store/tests/?search')
+        self.test_ids = TEST_ID.findall(response.text) or self.test_ids
+
+    @task(2)
+    def place_order(self):
+        if self.test_ids:
+            self.post('/store/orders/', {'test': random.choice(self.test_ids)}, name='/store/orders/ [POST]')
+
+    @task(2)
+    def pay_order(self):
+        response = self.client.get('/store/orders/')
+        order_ids = PAYABLE_ORDER_ID.findall(response.text)
+        if order_ids:
+            order_id = random.choice(order_ids)
+            self.client.get(f"/store/orders/{order_id}/payment/", name='/store/orders/:id/payment')
+
+    @task(1)
+    def book_checkup(self):
+        if not self.doctor_ids:
+            response = self.client.get('/store/doctors/')
+            self.doctor_ids = DOCTOR_ID.findall(response.text)
+        if self.doctor_ids:
+            self.post('/store/checkups/', {'doctor': random.choice(self.doctor_ids)}, name='/store/checkups/ [POST]')
+
+    @task(1)
+    def pay_checkup(self):
+        response = self.client.get('/store/checkups/')
+        checkup_ids = PAYABLE_CHECKUP_ID.findall(response.text)
+        if checkup_ids:
+            checkup_id = random.choice(checkup_ids)
+            self.client.get(f"/store/checkups/{checkup_id}/payment/", name='/store/checkups/:id/payment')
+
+    @task(2)
+    def download_report(self):
+        response = self.client.get('/store/reports/')
+        report_ids = REPORT_ID.findall(response.text)
+        if report_ids:
+            report_id = random.choice(report_ids)
+            self.client.get(f"/store/reports/{report_id}/download/", name='/store/reports/:id/download')
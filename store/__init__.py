@@ -0,0 +1 @@
+from .celery import celery
@@ -1,3 +1,4 @@
+from django import forms
 from django.contrib import admin
 from django.db.models import Count
 from django.urls import reverse
@@ -168,23 +169,17 @@ class OrderAdmin(admin.ModelAdmin):
     autocomplete_fields = ['user']
     inlines = [OrderedTestsInline]
     search_fields = ['id']
-    list_display = ['id', 'placed_at', 'payment_status', 'user', 'report_status']       # 'ordered_tests_count']
+    list_display = ['id', 'placed_at', 'payment_status', 'user', 'item_count', 'total_amount', 'report_status']
+    readonly_fields = ['item_count', 'total_amount']
 
     def report_status(self, order: models.Order):
-        try:
-            order.reports.get(order_id=order.id)
+        if order.reports.exists():
             return 'Created'
-        except models.Report.DoesNotExist:
-            url = reverse('admin:store_report_add')
-            return format_html('<a href="{}">Create!</a>', url)
-
-    # @admin.display(ordering='ordered_tests_count')
-    # def ordered_tests_count(self, order: models.Order):
-    #     return format_html('<a>{} Tests</a>', order.ordered_tests_count)
+        url = reverse('admin:store_report_add')
+        return format_html('<a href="{}">Create!</a>', url)
 
     def get_queryset(self, request):
-        return super(OrderAdmin, self).get_queryset(request).\
-            select_related('user', 'tests').annotate(ordered_tests_count=Count('tests'))
+        return super(OrderAdmin, self).get_queryset(request).select_related('user')
 
 
 class DoctorForCheckupInline(admin.TabularInline):
@@ -199,16 +194,15 @@ class DoctorForCheckupInline(admin.TabularInline):
 class CheckupAdmin(admin.ModelAdmin):
     autocomplete_fields = ['user']
     inlines = [DoctorForCheckupInline]
-    list_display = ['id', 'user', 'booked_at', 'payment_status', 'doctors_for_checkup']
+    list_display = ['id', 'user', 'booked_at', 'payment_status', 'doctors_for_checkup', 'total_amount']
+    readonly_fields = ['item_count', 'total_amount']
 
-    @admin.display(ordering='doctors_for_checkup')
+    @admin.display(ordering='item_count')
     def doctors_for_checkup(self, checkup: models.Checkup):
-        return format_html('<a>{} Doctors</a>', checkup.doctors_for_checkup)
+        return format_html('<a>{} Doctors</a>', checkup.item_count)
 
     def get_queryset(self, request):
-        return super(CheckupAdmin, self).get_queryset(request).annotate(
-            doctors_for_checkup=Count('doctors')
-        )
+        return super(CheckupAdmin, self).get_queryset(request).select_related('user')
 
 
 @admin.register(models.Review)
@@ -231,18 +225,28 @@ class SubscribeAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'date']
 
 
+class ReportForm(forms.ModelForm):
+    def clean(self):
+        cleaned_data = super().clean()
+        order, test = cleaned_data.get('order'), cleaned_data.get('test')
+        # an order can hold several tests now, each one gets its own report
+        if order and test and not order.tests.filter(test=test).exists():
+            raise forms.ValidationError({'test': 'This test is not part of the order.'})
+        return cleaned_data
+
+
 @admin.register(models.Report)
 class ReportAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
-        obj.test = obj.order.tests.test
         obj.user = obj.order.user
         super(ReportAdmin, self).save_model(request, obj, form, change)
 
     def name(self, report: models.Report):
         return report.user
 
-    autocomplete_fields = ['order']
+    form = ReportForm
+    autocomplete_fields = ['order', 'test']
     list_display = ['id', 'order', 'name', 'detail']
-    readonly_fields = ['test', 'user']
+    readonly_fields = ['user']
 
 
@@ -0,0 +1,261 @@
+import bisect
+import heapq
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import Counter, defaultdict
+from itertools import chain
+from operator import itemgetter
+
+from django.conf import settings
+from django.db.models import Count
+
+from . import links
+from .models import Doctor, Test
+
+MAGIC = b'ACv2'
+HEADER = struct.Struct('<4sIII')
+OFFSET = struct.Struct('<I')
+TRIGRAM = struct.Struct('<3sII')
+SEPARATOR = '\x1f'
+
+NON_WORD = re.compile(r'[^a-z0-9]+')
+DOCTOR_TITLE = re.compile(r'^(dr|doctor)\b')
+
+KIND_TEST = 't'
+KIND_DOCTOR = 'd'
+KINDS = {
+    KIND_TEST: ('test', 'store:tests-list'),
+    KIND_DOCTOR: ('doctor', 'store:doctors-list'),
+}
+# prefix matches ranked per query; a one letter query does not rank the whole catalog
+MAX_CANDIDATES = 500
+
+
+def normalize(text):
+    text = NON_WORD.sub(' ', (text or '').lower()).strip()
+    return DOCTOR_TITLE.sub('', text).strip()
+
+
+def trigrams(text):
+    text = f" {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def keys_of(*values):
+    # the whole value and every word of it, so "prof" finds "Thyroid Profile"
+    keys = set()
+    for value in values:
+        value = normalize(value)
+        if value:
+            keys.add(value)
+            keys.update(value.split())
+    return keys
+
+
+def build_records():
+    # popularity is how often a test was ordered or a doctor booked
+    records = []
+    tests = Test.objects.annotate(popularity=Count('orderedtest')).values_list('id', 'title', 'code', 'popularity')
+    for test_id, title, code, popularity in tests.iterator(chunk_size=2000):
+        label = f"{title} [{code}]"
+        for key in keys_of(title, code):
+            records.append((key, KIND_TEST, test_id, label, popularity))
+    doctors = Doctor.objects.annotate(popularity=Count('doctorforcheckup')).values_list(
+        'id', 'first_name', 'last_name', 'popularity')
+    for doctor_id, first_name, last_name, popularity in doctors.iterator(chunk_size=2000):
+        label = f"Dr. {first_name} {last_name}"
+        for key in keys_of(f"{first_name} {last_name}", first_name, last_name):
+            records.append((key, KIND_DOCTOR, doctor_id, label, popularity))
+    records.sort()
+    return records
+
+
+def build_postings(records):
+    # one posting per object, pointing at the record of its first key
+    objects = {}
+    for position, (key, kind, object_id, *_) in enumerate(records):
+        objects.setdefault((kind, object_id), (position, set()))[1].update(trigrams(key))
+    postings = defaultdict(list)
+    for position, object_trigrams in objects.values():
+        for trigram in object_trigrams:
+            postings[trigram.encode()].append(position)
+    return sorted(postings.items())
+
+
+def write_snapshot(path, records):
+    # <magic><record count><trigram count><posting count>
+    # <one offset into the data block per record>
+    # <one (trigram, first posting, posting count) entry per trigram, sorted>
+    # <the postings, record positions grouped by trigram>
+    # <data block>, one "key SEP kind SEP id SEP popularity SEP label" line per record, sorted by key
+    data = bytearray()
+    offsets = []
+    for key, kind, object_id, label, popularity in records:
+        offsets.append(len(data))
+        label = label.replace('\n', ' ').replace(SEPARATOR, ' ')
+        data += f"{key}{SEPARATOR}{kind}{SEPARATOR}{object_id}{SEPARATOR}{popularity}{SEPARATOR}{label}\n".encode()
+    postings = build_postings(records)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(offsets), len(postings), sum(len(positions) for _, positions in postings)))
+        for offset in offsets:
+            file.write(OFFSET.pack(offset))
+        first = 0
+        for trigram, positions in postings:
+            file.write(TRIGRAM.pack(trigram, first, len(positions)))
+            first += len(positions)
+        for _, positions in postings:
+            file.write(struct.pack(f'<{len(positions)}I', *positions))
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+class SnapshotIndex:
+    # A read-only view of a snapshot file. The pages are mapped, not read, so
+    # all worker processes on a host share one copy through the page cache.
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            self.version = (stat.st_ino, stat.st_mtime_ns)
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an autocomplete snapshot")
+        _, self.count, self.trigram_count, posting_count = HEADER.unpack_from(self.map, 0)
+        self.trigrams_start = HEADER.size + self.count * OFFSET.size
+        self.postings_start = self.trigrams_start + self.trigram_count * TRIGRAM.size
+        self.data_start = self.postings_start + posting_count * OFFSET.size
+        self.keys = _Keys(self)
+        self.trigram_keys = _Trigrams(self)
+
+    def record(self, position):
+        start = self.data_start + OFFSET.unpack_from(self.map, HEADER.size + position * OFFSET.size)[0]
+        end = self.map.find(b'\n', start)
+        key, kind, object_id, popularity, label = self.map[start:end].decode().split(SEPARATOR)
+        return key, kind, int(object_id), label, int(popularity)
+
+    def prefix(self, query, limit, found):
+        # exact matches first, then the most ordered or booked, then the shortest labels
+        ranks = {}
+        position = bisect.bisect_left(self.keys, query)
+        end = min(self.count, position + MAX_CANDIDATES)
+        while position < end:
+            key, kind, object_id, label, popularity = self.record(position)
+            if not key.startswith(query):
+                break
+            rank = (key != query, -popularity, len(label), label)
+            if (kind, object_id) not in ranks or rank < ranks[(kind, object_id)]:
+                ranks[(kind, object_id)] = rank
+            position += 1
+        for (kind, object_id), rank in heapq.nsmallest(limit, ranks.items(), key=itemgetter(1)):
+            found.setdefault((kind, object_id), rank[-1])
+
+    def postings(self, trigram):
+        # read straight from the mapped file, so no process builds the index itself
+        trigram = trigram.encode()
+        position = bisect.bisect_left(self.trigram_keys, trigram)
+        if position == self.trigram_count or self.trigram_keys[position] != trigram:
+            return ()
+        _, first, count = TRIGRAM.unpack_from(self.map, self.trigrams_start + position * TRIGRAM.size)
+        return struct.unpack_from(f'<{count}I', self.map, self.postings_start + first * OFFSET.size)
+
+    def fuzzy(self, query, limit, found):
+        query_trigrams = trigrams(query)
+        scores = Counter(chain.from_iterable(self.postings(trigram) for trigram in query_trigrams))
+        # a match must share at least half of the query's trigrams
+        threshold = max(1, len(query_trigrams) // 2)
+        for position, score in heapq.nlargest(limit, scores.items(), key=itemgetter(1)):
+            if score < threshold:
+                break
+            _, kind, object_id, label, _ = self.record(position)
+            found.setdefault((kind, object_id), label)
+
+    def search(self, query, limit):
+        query = normalize(query)
+        found = {}
+        if query:
+            self.prefix(query, limit, found)
+            # trigrams only for infixes and typos, which no prefix matches
+            if not found and len(query) >= 3:
+                self.fuzzy(query, limit, found)
+        return [
+            {
+                'type': KINDS[kind][0],
+                'id': object_id,
+                'label': label,
+                'url': links.object_url(KINDS[kind][1], object_id),
+            }
+            for (kind, object_id), label in found.items()
+        ]
+
+
+class _Keys:
+    # lets bisect() read the sorted keys straight from the mapped file
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return self.index.count
+
+    def __getitem__(self, position):
+        index = self.index
+        start = index.data_start + OFFSET.unpack_from(index.map, HEADER.size + position * OFFSET.size)[0]
+        end = index.map.find(SEPARATOR.encode(), start)
+        return index.map[start:end].decode()
+
+
+class _Trigrams:
+    # lets bisect() read the sorted trigrams straight from the mapped file
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return self.index.trigram_count
+
+    def __getitem__(self, position):
+        index = self.index
+        return TRIGRAM.unpack_from(index.map, index.trigrams_start + position * TRIGRAM.size)[0]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def rebuild():
+    write_snapshot(settings.AUTOCOMPLETE_SNAPSHOT, build_records())
+
+
+def get_index():
+    # Every worker maps the same snapshot, and remaps it when another process
+    # replaces the file. Only the first process to find no snapshot builds it.
+    global _index
+    path = settings.AUTOCOMPLETE_SNAPSHOT
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        stat = None
+    with _index_lock:
+        if stat is None:
+            rebuild()
+            stat = os.stat(path)
+        if _index is None or _index.path != path or _index.version != (stat.st_ino, stat.st_mtime_ns):
+            try:
+                _index = SnapshotIndex(path)
+            except ValueError:
+                # a snapshot written by an older release
+                rebuild()
+                _index = SnapshotIndex(path)
+        return _index
+
+
+def search(query, limit=None):
+    if limit is None:
+        limit = settings.AUTOCOMPLETE_LIMIT
+    return get_index().search(query, limit)
@@ -0,0 +1,94 @@
+import bisect
+import threading
+
+from django.core.cache import cache
+
+from .models import Timing
+
+VERSION_KEY = 'store:availability:{}:version'
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+class DayIndex:
+    # The timings of one day, cut into segments at every start and end. Each
+    # segment knows which doctors work through all of it, so "who is free at
+    # 17:30" is one bisect instead of a scan over the timings.
+
+    def __init__(self, timings):
+        # timings: (doctor_id, department_id, start, end) rows
+        self.departments = {}
+        boundaries = set()
+        intervals = []
+        for doctor_id, department_id, start, end in timings:
+            start, end = to_minutes(start), to_minutes(end)
+            if end <= start:
+                # a shift past midnight is indexed up to the end of its day
+                end = MINUTES_PER_DAY
+            self.departments[doctor_id] = department_id
+            boundaries.update((start, end))
+            intervals.append((start, end, doctor_id))
+
+        self.boundaries = sorted(boundaries)
+        segments = [set() for _ in self.boundaries]
+        for start, end, doctor_id in intervals:
+            first = bisect.bisect_left(self.boundaries, start)
+            last = bisect.bisect_left(self.boundaries, end)
+            for segment in segments[first:last]:
+                segment.add(doctor_id)
+        self.segments = [frozenset(segment) for segment in segments]
+
+    def available(self, minute, department_id=None):
+        position = bisect.bisect_right(self.boundaries, minute) - 1
+        if position < 0:
+            return set()
+        doctor_ids = self.segments[position]
+        if department_id is None:
+            return set(doctor_ids)
+        return {doctor_id for doctor_id in doctor_ids if self.departments[doctor_id] == department_id}
+
+
+class AvailabilityIndex:
+    # Every process keeps its own day indexes. Changing a timing bumps the
+    # shared version of its day, and each process rebuilds just that day the
+    # next time it is asked about it.
+
+    def __init__(self):
+        self.days = {}
+        self.lock = threading.Lock()
+
+    def get_day(self, day_id):
+        version = cache.get(VERSION_KEY.format(day_id), 0)
+        with self.lock:
+            day = self.days.get(day_id)
+            if day is None or day[0] != version:
+                timings = Timing.objects.filter(day_id=day_id).values_list(
+                    'doctor_id', 'doctor__department_id', 'start', 'end'
+                )
+                day = (version, DayIndex(timings))
+                self.days[day_id] = day
+            return day[1]
+
+    def available(self, day_id, time, department_id=None):
+        return self.get_day(day_id).available(to_minutes(time), department_id)
+
+
+index = AvailabilityIndex()
+
+
+def days_changed(day_ids):
+    for day_id in day_ids:
+        key = VERSION_KEY.format(day_id)
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def available_doctor_ids(day_id, time, department_id=None):
+    return index.available(day_id, time, department_id)
@@ -0,0 +1,89 @@
+import calendar
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Checkup, DoctorForCheckup, TimingSlot
+
+WEEKDAYS = {name.lower(): number for number, name in enumerate(calendar.day_name)}
+
+
+class SlotFull(Exception):
+    pass
+
+
+class NoTimings(Exception):
+    pass
+
+
+def next_date(day, today):
+    weekday = WEEKDAYS.get(day.name.lower())
+    if weekday is None:
+        return today
+    return today + datetime.timedelta(days=(weekday - today.weekday()) % 7)
+
+
+def next_timing_date(timing, now):
+    date = next_date(timing.day, now.date())
+    # today's timing can't be booked once it is over
+    if date == now.date() and timing.end <= now.time():
+        date += datetime.timedelta(days=7)
+    return date
+
+
+def book(user_id, doctor, timing=None):
+    # Books the doctor in the given timing, or in the doctor's next timing
+    # with a free place. Raises SlotFull when there is none, and NoTimings
+    # when the doctor has no timings at all.
+    now = timezone.localtime()
+    today = now.date()
+    timings = [timing] if timing is not None else list(doctor.timings.select_related('day'))
+    candidates = sorted(
+        ((next_timing_date(timing, now), timing) for timing in timings),
+        key=lambda candidate: (candidate[0], candidate[1].start)
+    )
+    if not candidates:
+        raise NoTimings
+
+    # the slots are created up front, in their own transaction, so concurrent
+    # bookings only ever update them
+    TimingSlot.objects.bulk_create(
+        [TimingSlot(timing=timing, date=date, capacity=timing.capacity) for date, timing in candidates],
+        ignore_conflicts=True
+    )
+
+    with transaction.atomic():
+        # One booking per user at a time, so two requests can't both create
+        # today's checkup. Locks are always taken user first, slot second.
+        get_user_model().objects.select_for_update().only('id').get(pk=user_id)
+
+        checkup = Checkup.objects.filter(
+            user_id=user_id,
+            booked_at=today,
+            payment_status=Checkup.PAYMENT_STATUS_PENDING
+        ).first()
+        if checkup is None:
+            checkup = Checkup.objects.create(user_id=user_id)
+        else:
+            booking = DoctorForCheckup.objects.filter(checkup=checkup, doctor=doctor).first()
+            if booking is not None:
+                return booking
+
+        for date, timing in candidates:
+            slots = TimingSlot.objects.filter(timing=timing, date=date)
+            # the row lock of the UPDATE makes check and increment one step
+            if slots.filter(booked__lt=F('capacity')).update(booked=F('booked') + 1):
+                return DoctorForCheckup.objects.create(
+                    checkup=checkup,
+                    doctor=doctor,
+                    doctor_fees=doctor.fees,
+                    slot=slots.get()
+                )
+        raise SlotFull
+
+
+def release(slot_id):
+    TimingSlot.objects.filter(pk=slot_id, booked__gt=0).update(booked=F('booked') - 1)
@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+from django.db import transaction
+
+from . import totals
+from .models import Order, OrderedTest, Test
+
+
+class UnknownTests(Exception):
+    def __init__(self, test_ids):
+        super().__init__(test_ids)
+        self.test_ids = test_ids
+
+
+def merge(items):
+    # (test_id, quantity) pairs, with the quantities of a repeated test added up
+    quantities = OrderedDict()
+    for test_id, quantity in items:
+        quantities[test_id] = quantities.get(test_id, 0) + quantity
+    return quantities
+
+
+def checkout(user_id, items):
+    # Places one order holding every test of the cart. Raises UnknownTests
+    # when some of the tests do not exist.
+    quantities = merge(items)
+    tests = Test.objects.in_bulk(list(quantities))
+    missing = [test_id for test_id in quantities if test_id not in tests]
+    if missing:
+        raise UnknownTests(missing)
+
+    with transaction.atomic():
+        order = Order.objects.create(user_id=user_id)
+        OrderedTest.objects.bulk_create([
+            OrderedTest(
+                order=order,
+                test=tests[test_id],
+                quantity=quantity,
+                unit_price=tests[test_id].unit_price
+            )
+            for test_id, quantity in quantities.items()
+        ])
+        # bulk_create() sends no signals, so the totals are computed here
+        totals.refresh(Order, [order.pk])
+    order.refresh_from_db(fields=['total_amount', 'item_count'])
+    return order
@@ -0,0 +1,84 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'store:catalog:'
+
+# the cached responses of every scope that shows data of the model
+SCOPES = {
+    'Test': ['tests', 'collections'],
+    'TestImage': ['tests'],
+    'Collection': ['collections', 'tests'],
+    'Doctor': ['doctors', 'departments'],
+    'Timing': ['doctors'],
+    'Qualification': ['doctors'],
+    'Department': ['departments', 'doctors'],
+}
+
+
+def _version_key(scope):
+    return f"{KEY_PREFIX}{scope}:version"
+
+
+def version(scope):
+    return cache.get(_version_key(scope), 0)
+
+
+def bump(scope):
+    # a new version makes every cached response of the scope unreachable at once
+    key = _version_key(scope)
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def model_changed(model_name):
+    for scope in SCOPES.get(model_name, ()):
+        bump(scope)
+
+
+def response_key(scope, *parts):
+    digest = hashlib.sha256('\0'.join(str(part) for part in parts).encode()).hexdigest()
+    return f"{KEY_PREFIX}{scope}:{version(scope)}:{digest}"
+
+
+def _store(key, data):
+    fresh_until = time.time() + settings.CATALOG_CACHE_TIMEOUT
+    cache.set(key, (fresh_until, data), timeout=settings.CATALOG_CACHE_TIMEOUT + settings.CATALOG_CACHE_STALE_TIMEOUT)
+
+
+def get_or_compute(key, compute):
+    # Stampede protection: of all the requests that find an entry missing or
+    # stale, only the one holding the lock computes it. The others serve the
+    # stale entry, or wait a moment for the fresh one.
+    lock_key = key + ':lock'
+    entry = cache.get(key)
+    if entry is not None:
+        fresh_until, data = entry
+        if fresh_until >= time.time() or not cache.add(lock_key, True, timeout=settings.CATALOG_CACHE_LOCK_TIMEOUT):
+            return data
+    elif not cache.add(lock_key, True, timeout=settings.CATALOG_CACHE_LOCK_TIMEOUT):
+        deadline = time.monotonic() + settings.CATALOG_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[1]
+            if cache.get(lock_key) is None:
+                # the lock holder got an error, which is not cached
+                break
+        # or died, or is too slow; compute without it
+        return compute()
+
+    try:
+        data = compute()
+        if data is not None:
+            _store(key, data)
+        return data
+    finally:
+        cache.delete(lock_key)
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    # the render, SMS and autocomplete debounce flags, the report cache metrics and
+    # the login throttle are shared by every web and celery process through the cache
+    backend = settings.CACHES['default']['BACKEND']
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Warning(
+            f"The default cache {backend} is not shared between processes.",
+            hint="Point CACHES['default'] at Redis or Memcached, or report renders are scheduled "
+                 "once per process and the cache metrics only count one process.",
+            id='store.W001',
+        )]
+    return []
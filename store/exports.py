@@ -0,0 +1,55 @@
+import zipfile
+
+from django.conf import settings
+
+from .reports import report_file_name, test_report_content
+
+
+class ZipStream:
+    # A write-only, unseekable file object: zipfile falls back to data descriptors
+    # and everything written so far can be handed out and forgotten.
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks = self.chunks
+        self.chunks = []
+        return chunks
+
+
+def export_queryset(filterset):
+    return filterset.qs.\
+        select_related('user', 'test').\
+        only('id', 'order_id', 'detail', 'pdf', 'user__username', 'test__title').\
+        order_by('id')
+
+
+def stream_reports_zip(queryset, chunk_size=None):
+    if chunk_size is None:
+        chunk_size = settings.REPORT_EXPORT_CHUNK_SIZE
+
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for report in queryset.iterator(chunk_size=chunk_size):
+            file_name = str(report.id) + "_" + report_file_name(
+                report.user.username,
+                report.order_id,
+                report.test.title
+            )
+            archive.writestr(file_name, test_report_content(report))
+            yield from stream.drain()
+    # closing the archive writes the central directory
+    yield from stream.drain()
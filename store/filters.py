@@ -1,4 +1,4 @@
-from django_filters.rest_framework import FilterSet
+from django_filters.rest_framework import FilterSet, DateFilter
 from . import models
 
 
@@ -53,6 +53,17 @@ class ReportFilter(FilterSet):
         }
 
 
+class ReportExportFilter(FilterSet):
+    start = DateFilter(field_name='date', lookup_expr='gte', required=True)
+    end = DateFilter(field_name='date', lookup_expr='lte', required=True)
+
+    class Meta:
+        model = models.Report
+        fields = {
+            'test': ['exact'],
+        }
+
+
 class OrderedTestFilter(FilterSet):
     class Meta:
         model = models.OrderedTest
@@ -0,0 +1,28 @@
+from functools import lru_cache
+
+from django.urls import reverse
+from django.utils.html import conditional_escape
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+
+
+@lru_cache(maxsize=None)
+def route(name):
+    # the URL resolver is walked once per route and process, not once per row
+    return reverse(name)
+
+
+def object_url(name, pk, action=None):
+    url = route(name) + str(pk)
+    if action is not None:
+        url += '/' + action + '/'
+    return url
+
+
+def filter_url(name, **params):
+    return route(name) + '?' + urlencode(params)
+
+
+def html(template, *args):
+    # format_html() without the lazy-string and keyword argument handling
+    return mark_safe(template.format(*[conditional_escape(arg) for arg in args]))
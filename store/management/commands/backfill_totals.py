@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from store import totals
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored total_amount and item_count of every order and checkup from their items.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        for model in totals.ITEMS:
+            pks = list(model.objects.order_by('pk').values_list('pk', flat=True))
+            updated = 0
+            # short transactions, so a large table is never locked for long
+            for start in range(0, len(pks), chunk_size):
+                with transaction.atomic():
+                    updated += totals.refresh(model, pks[start:start + chunk_size])
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {updated} updated")
+        self.stdout.write(self.style.SUCCESS('Totals backfilled'))
@@ -0,0 +1,91 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from store import models, serializers
+
+
+class Command(BaseCommand):
+    help = 'Times list rendering of the store serializers. Rows are seeded in a transaction that is rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('sizes', nargs='*', type=int, default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            with transaction.atomic():
+                self.seed(size)
+                self.stdout.write(f"{size} rows")
+                for name, serializer_class, queryset in self.cases():
+                    rows = list(queryset)
+                    best = min(self.measure(serializer_class, rows) for _ in range(options['repeat']))
+                    self.stdout.write(f"  {name:<20} {best * 1000:9.1f} ms")
+                transaction.set_rollback(True)
+
+    def measure(self, serializer_class, rows):
+        start = time.perf_counter()
+        serializer_class(rows, many=True).data
+        return time.perf_counter() - start
+
+    def cases(self):
+        return [
+            ('TestSerializer', serializers.TestSerializer,
+             models.Test.objects.select_related('collection')),
+            ('DoctorSerializer', serializers.DoctorSerializer,
+             models.Doctor.objects.select_related('department', 'qualification')),
+            ('OrderSerializer', serializers.OrderSerializer,
+             models.Order.objects.select_related('user').prefetch_related(
+                 'tests__test', Prefetch('reports', models.Report.objects.only('id', 'order_id', 'test_id'))
+             )),
+            ('CheckupSerializer', serializers.CheckupSerializer,
+             models.Checkup.objects.prefetch_related('doctors__doctor')),
+            ('QuerySerializer', serializers.QuerySerializer,
+             models.Query.objects.all()),
+            ('ReportSerializer', serializers.ReportSerializer,
+             models.Report.objects.select_related('test')),
+        ]
+
+    def seed(self, size):
+        user = get_user_model().objects.create(username='bench-serializers', email='bench@serializers.local')
+        collection = models.Collection.objects.create(title='bench-serializers')
+        department = models.Department.objects.create(title='bench-serializers')
+        qualification = models.Qualification.objects.create(title='bench-serializers', name='bench-serializers')
+
+        tests = models.Test.objects.bulk_create(
+            models.Test(
+                title=f"Test {i}", slug=f"test-{i}", code=f"bench-{i}",
+                unit_price=100, collection=collection
+            )
+            for i in range(size)
+        )
+        doctors = models.Doctor.objects.bulk_create(
+            models.Doctor(
+                first_name='Doctor', last_name=str(i), email=f"doctor{i}@bench.local",
+                phone='9999999999', qualification=qualification, department=department,
+                fees=500, address='-'
+            )
+            for i in range(size)
+        )
+        orders = models.Order.objects.bulk_create(models.Order(user=user) for _ in range(size))
+        models.OrderedTest.objects.bulk_create(
+            models.OrderedTest(order=order, test=test, unit_price=test.unit_price)
+            for order, test in zip(orders, tests)
+        )
+        # half of the orders already have a report
+        models.Report.objects.bulk_create(
+            models.Report(order=order, test=test, user=user, detail='-')
+            for order, test in list(zip(orders, tests))[::2]
+        )
+        checkups = models.Checkup.objects.bulk_create(models.Checkup(user=user) for _ in range(size))
+        models.DoctorForCheckup.objects.bulk_create(
+            models.DoctorForCheckup(checkup=checkup, doctor=doctor, doctor_fees=doctor.fees)
+            for checkup, doctor in zip(checkups, doctors)
+        )
+        models.Query.objects.bulk_create(
+            models.Query(name='bench', phone='9999999999', question=f"Question {i}")
+            for i in range(size)
+        )
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from store import autocomplete
+
+
+class Command(BaseCommand):
+    help = 'Writes the test and doctor autocomplete snapshot that the web workers map into memory.'
+
+    def handle(self, *args, **options):
+        autocomplete.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Autocomplete snapshot written to {settings.AUTOCOMPLETE_SNAPSHOT}"))
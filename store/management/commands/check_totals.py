@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store import totals
+
+MAX_LISTED = 20
+
+
+class Command(BaseCommand):
+    help = 'Lists the orders and checkups whose stored totals differ from their items.'
+
+    def handle(self, *args, **options):
+        found = 0
+        for model in totals.ITEMS:
+            pks = list(totals.inconsistent(model).values_list('pk', flat=True))
+            found += len(pks)
+            if pks:
+                listed = ', '.join(str(pk) for pk in pks[:MAX_LISTED])
+                more = f' and {len(pks) - MAX_LISTED} more' if len(pks) > MAX_LISTED else ''
+                self.stdout.write(f"{model._meta.verbose_name_plural}: {len(pks)} inconsistent ({listed}{more})")
+
+        if found:
+            raise CommandError(f'{found} stored totals are out of date; run backfill_totals to fix them.')
+        self.stdout.write(self.style.SUCCESS('All stored totals are consistent'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.exports import export_queryset, stream_reports_zip
+from store.filters import ReportExportFilter
+from store.models import Report
+
+
+class Command(BaseCommand):
+    help = 'Writes the PDFs of all reports in a date range into one ZIP file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('start', help='First report date, YYYY-MM-DD.')
+        parser.add_argument('end', help='Last report date, YYYY-MM-DD.')
+        parser.add_argument('output', help='Path of the ZIP file to write.')
+        parser.add_argument('--test', help='Only export reports of this test id.')
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        data = {
+            'start': options['start'],
+            'end': options['end'],
+        }
+        if options['test']:
+            data['test'] = options['test']
+
+        filterset = ReportExportFilter(data, queryset=Report.objects.all())
+        if not filterset.is_valid():
+            raise CommandError(filterset.errors.as_text())
+
+        with open(options['output'], 'wb') as file:
+            for chunk in stream_reports_zip(export_queryset(filterset), options['chunk_size']):
+                file.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Reports exported to {options['output']}"))
@@ -0,0 +1,57 @@
+import csv
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+
+from store.models import Subscribe
+
+
+def read_subscribers(file):
+    # (name, email) of every valid row; the header names the 'name' and 'email' columns
+    reader = csv.DictReader(file)
+    if not reader.fieldnames or not {'name', 'email'} <= set(reader.fieldnames):
+        raise CommandError("The CSV needs a header with 'name' and 'email' columns.")
+    for row in reader:
+        name, email = (row['name'] or '').strip(), (row['email'] or '').strip()
+        try:
+            validate_email(email)
+        except ValidationError:
+            yield None
+            continue
+        yield name[:Subscribe._meta.get_field('name').max_length], email
+
+
+class Command(BaseCommand):
+    help = 'Adds the subscribers of a CSV file, skipping the emails already subscribed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with 'name' and 'email' columns.")
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or settings.SUBSCRIBERS_IMPORT_BATCH_SIZE
+        before = Subscribe.objects.count()
+        rows = invalid = 0
+
+        with open(options['path'], newline='') as file:
+            subscribers = read_subscribers(file)
+            while True:
+                batch = list(islice(subscribers, batch_size))
+                if not batch:
+                    break
+                rows += len(batch)
+                valid = [subscriber for subscriber in batch if subscriber is not None]
+                invalid += len(batch) - len(valid)
+                # the unique index on email drops the duplicates, without a lookup per row
+                Subscribe.objects.bulk_create(
+                    [Subscribe(name=name, email=email) for name, email in valid],
+                    ignore_conflicts=True
+                )
+
+        added = Subscribe.objects.count() - before
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {rows} rows: {added} subscribed, {rows - invalid - added} already subscribed, {invalid} invalid"
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.settlements import reconcile_file
+
+
+class Command(BaseCommand):
+    help = 'Applies a settlement file of the payment gateway to orders and checkups, and writes its mismatches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV, or JSON lines (.json/.jsonl), with kind, id, status and amount.')
+        parser.add_argument('--report', help='Path of the mismatch CSV, <path>.mismatches.csv by default.')
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        report_path = options['report'] or options['path'] + '.mismatches.csv'
+        try:
+            summary = reconcile_file(options['path'], report_path, options['chunk_size'])
+        except OSError as error:
+            raise CommandError(error)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {summary['lines']} lines: {summary['updated']} updated, "
+            f"{summary['unchanged']} unchanged, {summary['mismatched']} mismatched (see {report_path})"
+        ))
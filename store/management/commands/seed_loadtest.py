@@ -0,0 +1,112 @@
+import datetime
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from store import autocomplete, catalog_cache, models
+from store.search import InMemorySearchBackend, get_search_backend
+
+PATIENT_USERNAME = 'loadtest-{}'
+PATIENT_PASSWORD = 'loadtest-password'
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+TEST_NAMES = [
+    'Thyroid Profile', 'HbA1c', 'Lipid Profile', 'Complete Blood Count', 'Liver Function Test',
+    'Kidney Function Test', 'Vitamin D', 'Vitamin B12', 'Blood Sugar Fasting', 'Urine Routine',
+]
+
+
+class Command(BaseCommand):
+    help = 'Seeds the catalog and patient accounts used by the locust load tests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collections', type=int, default=20)
+        parser.add_argument('--tests', type=int, default=5000)
+        parser.add_argument('--departments', type=int, default=15)
+        parser.add_argument('--doctors', type=int, default=200)
+        parser.add_argument('--patients', type=int, default=100)
+        parser.add_argument('--orders-per-patient', type=int, default=20)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        random.seed(2022)
+        collections = models.Collection.objects.bulk_create(
+            models.Collection(title=f"Collection {i}") for i in range(options['collections'])
+        )
+        tests = models.Test.objects.bulk_create(
+            models.Test(
+                title=f"{TEST_NAMES[i % len(TEST_NAMES)]} {i}",
+                slug=f"test-{i}",
+                code=f"LT-{i}",
+                description=f"{TEST_NAMES[i % len(TEST_NAMES)]} panel, sample {i}.",
+                unit_price=random.randint(100, 5000),
+                collection=collections[i % len(collections)],
+            )
+            for i in range(options['tests'])
+        )
+
+        departments = models.Department.objects.bulk_create(
+            models.Department(title=f"Department {i}") for i in range(options['departments'])
+        )
+        qualification = models.Qualification.objects.create(title='MBBS (LT)', name='Bachelor of Medicine (LT)')
+        doctors = models.Doctor.objects.bulk_create(
+            models.Doctor(
+                first_name=f"Doctor{i}",
+                last_name='Loadtest',
+                email=f"doctor{i}@loadtest.local",
+                phone='9999999999',
+                qualification=qualification,
+                department=departments[i % len(departments)],
+                fees=random.randint(300, 1500),
+                address='-',
+            )
+            for i in range(options['doctors'])
+        )
+        days = [models.Day.objects.get_or_create(name=name)[0] for name in DAYS]
+        models.Timing.objects.bulk_create(
+            models.Timing(
+                doctor=doctor,
+                day=day,
+                start=datetime.time(hour),
+                end=datetime.time(hour + 3),
+            )
+            for doctor in doctors
+            for day, hour in zip(random.sample(days, 3), (9, 14, 17))
+        )
+
+        user_model = get_user_model()
+        for i in range(options['patients']):
+            patient = user_model.objects.create_user(
+                username=PATIENT_USERNAME.format(i),
+                email=f"patient{i}@loadtest.local",
+                password=PATIENT_PASSWORD,
+            )
+            ordered = random.sample(tests, options['orders_per_patient'])
+            orders = models.Order.objects.bulk_create(
+                models.Order(user=patient, total_amount=test.unit_price, item_count=1) for test in ordered
+            )
+            models.OrderedTest.objects.bulk_create(
+                models.OrderedTest(order=order, test=test, unit_price=test.unit_price)
+                for order, test in zip(orders, ordered)
+            )
+            models.Report.objects.bulk_create(
+                models.Report(order=order, test=test, user=patient, detail=f"{test.title}: within range")
+                for order, test in list(zip(orders, ordered))[::2]
+            )
+
+        # bulk_create() sends no signals, so refresh what their handlers would have
+        transaction.on_commit(self.refresh_derived_data)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(tests)} tests, {len(doctors)} doctors and {options['patients']} patients "
+            f"({PATIENT_USERNAME.format('N')} / {PATIENT_PASSWORD})."
+        ))
+
+    def refresh_derived_data(self):
+        autocomplete.rebuild()
+        for model_name in catalog_cache.SCOPES:
+            catalog_cache.model_changed(model_name)
+        backend = get_search_backend()
+        if isinstance(backend, InMemorySearchBackend):
+            backend.bump_version()
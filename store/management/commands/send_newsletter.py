@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from store import newsletter
+from store.tasks import send_newsletter
+
+
+class Command(BaseCommand):
+    help = 'Sends a newsletter to every subscriber, through the Celery workers or from this process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('subject')
+        parser.add_argument('body_file', help='Text file with the body of the newsletter.')
+        parser.add_argument('--now', action='store_true',
+                            help='Send from this process instead of queueing the batches, and report the rate.')
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        with open(options['body_file']) as file:
+            context = {'subject': options['subject'], 'body': file.read()}
+
+        if not options['now']:
+            result = send_newsletter.delay(context)
+            self.stdout.write(self.style.SUCCESS(f"Newsletter queued (task {result.id})"))
+            return
+
+        batch_size = options['batch_size'] or settings.NEWSLETTER_BATCH_SIZE
+        sent = 0
+        start = time.perf_counter()
+        try:
+            for after_id, last_id in newsletter.batch_bounds(batch_size):
+                sent += newsletter.send_batch(context, after_id, last_id)
+        finally:
+            newsletter.mailer.close()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {sent} messages in {elapsed:.1f}s ({newsletter.rate(sent, elapsed):.1f} messages/s)"
+        ))
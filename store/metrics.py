@@ -0,0 +1,41 @@
+from django.core.cache import cache
+
+METRICS_PREFIX = 'store:metrics:'
+
+
+def _key(name):
+    return METRICS_PREFIX + name
+
+
+def incr(name, delta=1):
+    key = _key(name)
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # the key was evicted between add() and incr()
+        cache.set(key, delta, timeout=None)
+        return delta
+
+
+def observe(name, seconds):
+    incr(name + ':count')
+    incr(name + ':total_ms', int(seconds * 1000))
+    max_key = _key(name + ':max_ms')
+    if int(seconds * 1000) > (cache.get(max_key) or 0):
+        cache.set(max_key, int(seconds * 1000), timeout=None)
+
+
+def counters(*names):
+    values = cache.get_many([_key(name) for name in names])
+    return {name: values.get(_key(name), 0) for name in names}
+
+
+def timings(name):
+    values = counters(name + ':count', name + ':total_ms', name + ':max_ms')
+    count = values[name + ':count']
+    return {
+        'count': count,
+        'avg_ms': round(values[name + ':total_ms'] / count, 2) if count else 0,
+        'max_ms': values[name + ':max_ms'],
+    }
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.5 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_alter_qualification_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='pdf',
+            field=models.FileField(blank=True, editable=False, upload_to='store/reports'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.0.5 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_test_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checkup',
+            index=models.Index(fields=['user', 'booked_at', 'id'], name='store_checkup_user_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'placed_at', 'id'], name='store_order_user_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='query',
+            index=models.Index(fields=['date', 'id'], name='store_query_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['user', 'date', 'id'], name='store_report_user_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['date', 'id'], name='store_review_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['test', 'date', 'id'], name='store_review_test_keyset'),
+        ),
+    ]
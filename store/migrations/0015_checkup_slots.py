@@ -0,0 +1,38 @@
+# Generated by Django 4.0.5 on 2026-10-18 10:54
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0014_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timing',
+            name='capacity',
+            field=models.PositiveIntegerField(default=20, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.CreateModel(
+            name='TimingSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('capacity', models.PositiveIntegerField()),
+                ('booked', models.PositiveIntegerField(default=0)),
+                ('timing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='store.timing')),
+            ],
+            options={
+                'unique_together': {('timing', 'date')},
+            },
+        ),
+        migrations.AddField(
+            model_name='doctorforcheckup',
+            name='slot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='store.timingslot'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.0.5 on 2026-10-18 10:58
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_order_totals(apps, schema_editor):
+    # every existing order has exactly one test, and stays a valid one-test order
+    Order = apps.get_model('store', 'Order')
+    OrderedTest = apps.get_model('store', 'OrderedTest')
+    totals = OrderedTest.objects.filter(order=OuterRef('pk')).values('order').annotate(
+        total=Sum(F('unit_price') * F('quantity'))
+    ).values('total')
+    Order.objects.update(total_amount=Coalesce(
+        Subquery(totals, output_field=models.DecimalField()),
+        Value(0),
+        output_field=models.DecimalField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_checkup_slots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='orderedtest',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='tests', to='store.order'),
+        ),
+        migrations.RunPython(fill_order_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:05
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_totals(apps, schema_editor):
+    parents = [
+        ('Order', 'OrderedTest', 'order', F('unit_price') * F('quantity')),
+        ('Checkup', 'DoctorForCheckup', 'checkup', F('doctor_fees')),
+    ]
+    for parent_name, item_name, parent, amount in parents:
+        Parent = apps.get_model('store', parent_name)
+        Item = apps.get_model('store', item_name)
+        items = Item.objects.filter(**{parent: OuterRef('pk')}).order_by().values(parent)
+        Parent.objects.update(
+            total_amount=Coalesce(
+                Subquery(items.annotate(total=Sum(amount)).values('total'), output_field=models.DecimalField()),
+                Value(0),
+                output_field=models.DecimalField()
+            ),
+            item_count=Coalesce(Subquery(items.annotate(count=Count('pk')).values('count')), Value(0)),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0017_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkup',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='checkup',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0018_stored_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'payment_status', 'placed_at', 'id'], name='store_order_status_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['user', 'test', 'date', 'id'], name='store_report_test_keyset'),
+        ),
+    ]
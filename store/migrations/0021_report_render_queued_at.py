@@ -0,0 +1,18 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0020_sms_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='render_queued_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
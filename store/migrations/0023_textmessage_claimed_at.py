@@ -0,0 +1,18 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0022_idempotencykey_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='textmessage',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
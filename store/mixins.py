@@ -1,8 +1,131 @@
+import hashlib
+
 from django.contrib.auth.mixins import LoginRequiredMixin as BaseLoginRequiredMixin
+from django.db.models import Count, Max
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from . import catalog_cache
 
 
 class LoginRequiredMixin(BaseLoginRequiredMixin):
     def get_login_url(self):
         return str(reverse('core:login'))
 
+
+class CachedResponseMixin:
+    # Serves list and detail GETs from the catalog cache. The cache key covers
+    # the scope's version, so changing a model drops every response showing it.
+    cache_scope = None
+
+    def cached_response(self, method, request, *args, **kwargs):
+        response = None
+
+        def compute():
+            nonlocal response
+            response = method(request, *args, **kwargs)
+            return (response.data, self.page_state()) if response.status_code == status.HTTP_200_OK else None
+
+        key = catalog_cache.response_key(
+            self.cache_scope,
+            self.action,
+            kwargs.get('pk'),
+            request.get_host(),
+            sorted(request.query_params.lists()),
+        )
+        data, page = catalog_cache.get_or_compute(key, compute)
+        if response is not None:
+            return response
+        if page is not None:
+            self.restore_page(request, *page)
+        return Response(data)
+
+    def page_state(self):
+        # the HTML renderers draw the page controls from the paginator, not from the data
+        if isinstance(self.paginator, PageNumberPagination) and hasattr(self.paginator, 'page'):
+            return self.paginator.page.number, self.paginator.page.paginator.count
+        return None
+
+    def restore_page(self, request, number, count):
+        paginator = self.paginator
+        paginator.request = request
+        # a range stands in for the rows, so no query is run
+        paginator.page = paginator.django_paginator_class(range(count), paginator.get_page_size(request)).page(number)
+        paginator.display_page_controls = paginator.page.paginator.num_pages > 1 and paginator.template is not None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    # Answers list and detail GETs with 304 Not Modified when the client's copy
+    # is current, without serializing anything. The validator is the count and
+    # latest modification of the filtered rows, plus the catalog cache version,
+    # so changes to related models also change it.
+    last_modified_field = None
+
+    def get_validators(self, queryset, *parts):
+        aggregates = {'count': Count('pk')}
+        if self.last_modified_field:
+            aggregates['last_modified'] = Max(self.last_modified_field)
+        # cached like the responses, so revalidating a warm page runs no query at all
+        values = catalog_cache.get_or_compute(
+            catalog_cache.response_key(self.cache_scope, 'validators', *parts),
+            lambda: queryset.order_by().aggregate(**aggregates)
+        )
+        last_modified = values.get('last_modified')
+
+        digest = hashlib.sha256('\0'.join(str(part) for part in [
+            catalog_cache.version(self.cache_scope), values['count'], last_modified, *parts
+        ]).encode()).hexdigest()
+        # weak, as the same data is rendered by several renderers
+        etag = f'W/"{digest[:32]}"'
+        # HTTP dates have whole seconds
+        return etag, int(last_modified.timestamp()) if last_modified else None
+
+    def conditional_response(self, method, request, queryset, *parts, with_last_modified=True, **kwargs):
+        # staff get the admin forms, so their pages differ from everyone else's
+        etag, last_modified = self.get_validators(
+            queryset, request.accepted_media_type, request.user.is_staff, *parts
+        )
+        if not with_last_modified:
+            last_modified = None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = method(request, **kwargs)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+            # revalidate every time, instead of guessing a freshness lifetime
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def filter_queryset(self, queryset):
+        # list() needs the filtered rows for the validators and for the page;
+        # validating the filters twice would repeat their queries
+        if self.action != 'list':
+            return super().filter_queryset(queryset)
+        if not hasattr(self, '_filtered_queryset'):
+            self._filtered_queryset = super().filter_queryset(queryset)
+        return self._filtered_queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        # no Last-Modified: the latest change of the listed rows misses deleted rows
+        # and changes to related models, which only the ETag covers
+        return self.conditional_response(
+            super().list, request, queryset, 'list', sorted(request.query_params.lists()),
+            with_last_modified=False, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        queryset = self.get_queryset().filter(pk=kwargs['pk'])
+        return self.conditional_response(super().retrieve, request, queryset, 'detail', kwargs['pk'], **kwargs)
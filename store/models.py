@@ -1,5 +1,4 @@
 import time
-from datetime import datetime
 
 from django.contrib import admin
 from django.db import models
@@ -71,18 +70,32 @@ class Timing(models.Model):
     end = models.TimeField()
     day = models.ForeignKey(Day, on_delete=models.CASCADE)
     doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='timings')
+    capacity = models.PositiveIntegerField(
+        default=20,
+        validators=[
+            MinValueValidator(1),
+        ]
+    )
 
-    def convert_to_12_hour(self, value, formating_24="%H:%M:%S"):
-        formating_12 = "%I:%M %p"
-        value = str(value)
-        time24 = datetime.strptime(value, formating_24)
-        time12 = time24.strftime(formating_12)
-        return time12
+    def convert_to_12_hour(self, value):
+        return value.strftime("%I:%M %p")
 
     def __str__(self):
         return f"{self.convert_to_12_hour(self.start)} to {self.convert_to_12_hour(self.end)}"
 
 
+class TimingSlot(models.Model):
+    # One occurrence of a Timing on a date. booked only ever changes through a
+    # conditional UPDATE that checks it against capacity, see store.booking.
+    timing = models.ForeignKey(Timing, on_delete=models.CASCADE, related_name='slots')
+    date = models.DateField()
+    capacity = models.PositiveIntegerField()
+    booked = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [['timing', 'date']]
+
+
 class Collection(models.Model):
     title = models.CharField(max_length=255, unique=True)
     featured_test = models.ForeignKey(
@@ -144,11 +157,20 @@ class Checkup(models.Model):
         default=PAYMENT_STATUS_PENDING
     )
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
+    # kept in sync with the doctors by store.totals
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    item_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'booked_at', 'id'], name='store_checkup_user_keyset'),
+        ]
 
 
 class DoctorForCheckup(models.Model):
     checkup = models.ForeignKey(Checkup, on_delete=models.PROTECT, related_name='doctors')
     doctor = models.ForeignKey(Doctor, on_delete=models.PROTECT)
+    slot = models.ForeignKey(TimingSlot, on_delete=models.SET_NULL, null=True, blank=True, related_name='bookings')
     doctor_fees = models.DecimalField(
         max_digits=6,
         decimal_places=0,
@@ -175,6 +197,9 @@ class Order(models.Model):
         default=PAYMENT_STATUS_PENDING
     )
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
+    # kept in sync with the ordered tests by store.totals
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    item_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"Order ID {self.id}"
@@ -183,12 +208,16 @@ class Order(models.Model):
         permissions = [
             ('cancel_order', 'Can Cancel Order')
         ]
+        indexes = [
+            models.Index(fields=['user', 'placed_at', 'id'], name='store_order_user_keyset'),
+            models.Index(fields=['user', 'payment_status', 'placed_at', 'id'], name='store_order_status_keyset'),
+        ]
 
 
 class OrderedTest(models.Model):
     DEFAULT_QUANTITY = 1
 
-    order = models.OneToOneField(Order, on_delete=models.PROTECT, related_name='tests')
+    order = models.ForeignKey(Order, on_delete=models.PROTECT, related_name='tests')
     test = models.ForeignKey(Test, on_delete=models.PROTECT)
     quantity = models.IntegerField(
         default=DEFAULT_QUANTITY,
@@ -214,6 +243,12 @@ class Review(models.Model):
     description = models.TextField()
     date = models.DateField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'id'], name='store_review_keyset'),
+            models.Index(fields=['test', 'date', 'id'], name='store_review_test_keyset'),
+        ]
+
 
 class Query(models.Model):
     name = models.CharField(max_length=255)
@@ -227,6 +262,42 @@ class Query(models.Model):
     question = models.TextField()
     answer = models.TextField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'id'], name='store_query_keyset'),
+        ]
+
+
+class IdempotencyKey(models.Model):
+    # the stored response of a request made with an Idempotency-Key header,
+    # replayed when the client retries it
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    path = models.CharField(max_length=255)
+    status_code = models.PositiveSmallIntegerField()
+    content_type = models.CharField(max_length=100)
+    content = models.BinaryField()
+    # keys older than IDEMPOTENCY_KEY_TTL are purged by store.tasks.purge_idempotency_keys
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = [['user', 'key']]
+
+
+class TextMessage(models.Model):
+    # an SMS waiting in the outbox, until store.sms sends it
+    phone = models.CharField(max_length=16)
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # set by the flush that is sending the message, so no other flush sends it too
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sent_at', 'id'], name='store_textmessage_outbox'),
+        ]
+
 
 class Subscribe(models.Model):
     name = models.CharField(max_length=150)
@@ -243,3 +314,11 @@ class Report(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
     detail = models.TextField()
     date = models.DateField(auto_now_add=True)
+    pdf = models.FileField(upload_to='store/reports', blank=True, editable=False)
+    render_queued_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date', 'id'], name='store_report_user_keyset'),
+            models.Index(fields=['user', 'test', 'date', 'id'], name='store_report_test_keyset'),
+        ]
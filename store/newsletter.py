@@ -0,0 +1,106 @@
+import copy
+import logging
+import smtplib
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from templated_mail.mail import BaseEmailMessage
+
+from .models import Subscribe
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE = 'email/newsletter.html'
+
+
+def batch_bounds(batch_size):
+    # (after_id, last_id) of every batch of subscribers, read a key range at a
+    # time instead of with OFFSET, so the last batch is as cheap as the first
+    after_id = 0
+    while True:
+        ids = list(
+            Subscribe.objects.filter(id__gt=after_id).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        yield after_id, ids[-1]
+        after_id = ids[-1]
+
+
+def render(context, template_name=TEMPLATE):
+    # subject and bodies are the same for every subscriber, so they are rendered once
+    message = BaseEmailMessage(context=context, template_name=template_name)
+    message.render()
+    message.from_email = settings.DEFAULT_FROM_EMAIL
+    return message
+
+
+def addressed(message, email):
+    recipient = copy.copy(message)
+    recipient.to = [email]
+    recipient.cc, recipient.bcc, recipient.reply_to = [], [], []
+    return recipient
+
+
+class Mailer:
+    # One SMTP connection per worker process, kept open from batch to batch.
+    # A connection the server dropped while idle is opened again once.
+
+    def __init__(self):
+        self.connection = None
+
+    def send(self, message):
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = get_connection(fail_silently=False)
+                self.connection.open()
+            try:
+                return self.connection.send_messages([message])
+            except smtplib.SMTPServerDisconnected:
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            finally:
+                self.connection = None
+
+
+mailer = Mailer()
+
+
+def send_batch(context, after_id, last_id, template_name=TEMPLATE, progress=None):
+    # Sends to the subscribers with after_id < id <= last_id, in id order.
+    # progress(id) is called after each message, so a retry can resume after it.
+    start = time.perf_counter()
+    max_rate = settings.NEWSLETTER_MAX_RATE
+    message = render(context, template_name)
+    subscribers = Subscribe.objects.filter(id__gt=after_id, id__lte=last_id).order_by('id').\
+        values_list('id', 'email')
+
+    sent = 0
+    for subscriber_id, email in subscribers:
+        if max_rate:
+            # stay under the provider's limit: the n-th message waits for n/max_rate seconds
+            delay = start + sent / max_rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        try:
+            sent += mailer.send(addressed(message, email))
+        except smtplib.SMTPRecipientsRefused:
+            # a bad address must not fail the batch over and over
+            logger.warning('Newsletter refused for subscriber %s', subscriber_id)
+        if progress is not None:
+            progress(subscriber_id)
+
+    elapsed = time.perf_counter() - start
+    logger.info('Newsletter batch %s-%s: %s messages, %.1f/s', after_id + 1, last_id, sent, rate(sent, elapsed))
+    return sent
+
+
+def rate(sent, elapsed):
+    return sent / elapsed if elapsed > 0 else 0.0
@@ -1,7 +1,112 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.template import loader
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class DefaultPagination(PageNumberPagination):
     page_size = 15
 
 
+class KeysetPagination(BasePagination):
+    # Pages through a queryset ordered on one field, with the primary key as
+    # the tie-breaker. The cursor holds the (field, pk) of the row a page
+    # starts after, so every page is one index range scan, however deep it is,
+    # and no COUNT(*) is run.
+    page_size = 15
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    template = 'rest_framework/pagination/previous_and_next.html'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = queryset.query.order_by[0] if queryset.query.order_by else '-pk'
+        self.field = ordering.lstrip('-')
+        descending = ordering.startswith('-')
+
+        cursor = self.decode_cursor(request, queryset.model)
+        self.reverse = cursor is not None and cursor['reverse']
+        if self.reverse:
+            # previous pages are read backwards from the cursor, then flipped
+            descending = not descending
+
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(prefix + self.field, prefix + 'pk')
+        if cursor is not None:
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}': cursor['value']}) |
+                Q(**{self.field: cursor['value'], f'pk__{lookup}': cursor['pk']})
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.display_page_controls = self.has_next or self.has_previous
+        return self.page
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        opts = model._meta
+        field = opts.pk if self.field == 'pk' else opts.get_field(self.field)
+        try:
+            value, pk, reverse = json.loads(urlsafe_b64decode(encoded.encode()))
+            # a tampered cursor must be a 404 here, not a 500 in the filter
+            value, pk = field.to_python(value), opts.pk.to_python(pk)
+            if value is None or pk is None:
+                raise ValueError
+            return {'value': value, 'pk': pk, 'reverse': bool(reverse)}
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        cursor = json.dumps([getattr(row, self.field), row.pk, reverse], cls=DjangoJSONEncoder)
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, urlsafe_b64encode(cursor.encode()).decode())
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_results(self, data):
+        return data['results']
+
+    def get_html_context(self):
+        return {
+            'previous_url': self.get_previous_link(),
+            'next_url': self.get_next_link(),
+        }
+
+    def to_html(self):
+        return loader.get_template(self.template).render(self.get_html_context())
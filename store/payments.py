@@ -0,0 +1,80 @@
+import datetime
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
+
+from . import sms
+from .models import IdempotencyKey, Order
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+
+# orders and checkups share their payment statuses; a failed payment can be
+# tried again, a complete one never
+PAYABLE = [Order.PAYMENT_STATUS_PENDING, Order.PAYMENT_STATUS_FAILED]
+COMPLETE = Order.PAYMENT_STATUS_COMPLETE
+
+
+def complete(queryset):
+    # One conditional UPDATE: of concurrent or repeated payments for the same
+    # row, only the first one changes it. Returns whether this call did.
+    return queryset.filter(payment_status__in=PAYABLE).update(payment_status=COMPLETE) == 1
+
+
+def confirm(queryset, phone, message):
+    # completes the payment and queues its confirmation SMS, both or neither
+    with transaction.atomic():
+        completed = complete(queryset)
+        if completed:
+            sms.notify(phone, message)
+    return completed
+
+
+def idempotent(view_method):
+    # Stores the response of a request sent with an Idempotency-Key header,
+    # and replays it when the same user sends that key again.
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        stored = IdempotencyKey.objects.filter(user_id=request.user.id, key=key).first()
+        if stored is None:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code >= 500:
+                return response
+            if hasattr(response, 'render'):
+                response.render()
+            # a concurrent retry may have stored its response first, then that one is kept
+            stored, created = IdempotencyKey.objects.get_or_create(
+                user_id=request.user.id,
+                key=key,
+                defaults={
+                    'path': request.path,
+                    'status_code': response.status_code,
+                    'content_type': response['Content-Type'],
+                    'content': response.content,
+                }
+            )
+            if created:
+                return response
+
+        if stored.path != request.path:
+            return HttpResponse(
+                'This Idempotency-Key was already used for another request.',
+                status=422,
+                content_type='text/plain'
+            )
+        response = HttpResponse(bytes(stored.content), status=stored.status_code, content_type=stored.content_type)
+        response['Idempotent-Replayed'] = 'true'
+        return response
+    return wrapper
+
+
+def purge_idempotency_keys():
+    # a client retries within minutes; past IDEMPOTENCY_KEY_TTL a stored response is never replayed
+    expired = timezone.now() - datetime.timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    return IdempotencyKey.objects.filter(created_at__lt=expired).delete()[0]
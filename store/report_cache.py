@@ -0,0 +1,114 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from . import metrics
+
+CACHE_DIR = 'store/reports/cache'
+
+# bump whenever draw_test_report() changes its layout, so old PDFs are never served
+TEMPLATE_VERSION = 1
+
+
+def cache_key(report):
+    digest = hashlib.sha256()
+    digest.update(f"{report.id}\0{TEMPLATE_VERSION}\0".encode())
+    digest.update(report.detail.encode())
+    return digest.hexdigest()
+
+
+def cache_name(report):
+    key = cache_key(report)
+    return f"{CACHE_DIR}/{key[:2]}/{key}.pdf"
+
+
+def get(report):
+    path = default_storage.path(cache_name(report))
+    try:
+        # the modification time doubles as the LRU clock
+        os.utime(path)
+    except FileNotFoundError:
+        metrics.incr('reports:cache:misses')
+        return None
+    metrics.incr('reports:cache:hits')
+    return path
+
+
+def put(report, content):
+    name = cache_name(report)
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # write to a temporary file first, so a download never sees half a PDF
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(content)
+    try:
+        # a concurrent render of the same report overwrites the file, its bytes are already counted
+        previous_size = os.path.getsize(path)
+    except FileNotFoundError:
+        previous_size = 0
+    os.replace(tmp_path, path)
+
+    if metrics.incr('reports:cache:bytes', len(content) - previous_size) > settings.REPORT_CACHE_MAX_BYTES:
+        evict()
+    return name
+
+
+def discard(name):
+    if name.startswith(CACHE_DIR + '/') and default_storage.exists(name):
+        size = default_storage.size(name)
+        default_storage.delete(name)
+        metrics.incr('reports:cache:bytes', -size)
+        metrics.incr('reports:cache:invalidations')
+
+
+def evict(max_bytes=None):
+    if max_bytes is None:
+        max_bytes = settings.REPORT_CACHE_MAX_BYTES
+    # evict down to 90% of the limit, so the next few renders don't trigger another scan
+    target = max_bytes * 9 // 10
+
+    entries = []
+    total = 0
+    root = default_storage.path(CACHE_DIR)
+    for directory, _, files in os.walk(root):
+        for file_name in files:
+            path = os.path.join(directory, file_name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    evicted = 0
+    if total > max_bytes:
+        entries.sort()
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            evicted += 1
+        metrics.incr('reports:cache:evictions', evicted)
+
+    # resynchronise the running estimate with what is really on disk
+    metrics.incr('reports:cache:bytes', total - metrics.counters('reports:cache:bytes')['reports:cache:bytes'])
+    return evicted
+
+
+def stats():
+    values = metrics.counters(
+        'reports:cache:hits',
+        'reports:cache:misses',
+        'reports:cache:evictions',
+        'reports:cache:invalidations',
+        'reports:cache:bytes',
+    )
+    return {name.rsplit(':', 1)[1]: value for name, value in values.items()}
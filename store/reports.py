@@ -1,11 +1,17 @@
 import io
+import time
+
+from django.core.files.storage import default_storage
 from django.http import FileResponse
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
 from reportlab.lib.pagesizes import A4
 
+from . import metrics, report_cache
+from .models import Report
 
-def create_test_report(username, order_id, test_name, report):
+
+def draw_test_report(report):
     buf = io.BytesIO()
     c = canvas.Canvas(buf, pagesize=A4, bottomup=0)
     text_obj = c.beginText()
@@ -17,7 +23,55 @@ def create_test_report(username, order_id, test_name, report):
     c.drawText(text_obj)
     c.showPage()
     c.save()
-    buf.seek(0)
+    return buf.getvalue()
+
 
-    file_name = str(username) + "_" + str(order_id) + "_" + str(test_name) + ".pdf"
+def report_file_name(username, order_id, test_name):
+    return str(username) + "_" + str(order_id) + "_" + str(test_name) + ".pdf"
+
+
+def create_test_report(username, order_id, test_name, report):
+    buf = io.BytesIO(draw_test_report(report))
+    file_name = report_file_name(username, order_id, test_name)
     return FileResponse(buf, as_attachment=True, filename=file_name)
+
+
+def render_test_report(report):
+    start = time.perf_counter()
+    name = report_cache.put(report, draw_test_report(report.detail))
+    metrics.observe('reports:render', time.perf_counter() - start)
+
+    # update() does not fire the signals, which would queue the report again
+    Report.objects.filter(pk=report.id, detail=report.detail).update(pdf=name)
+    report.pdf.name = name
+    return name
+
+
+def save_test_report(report):
+    if report_cache.get(report) is None:
+        return render_test_report(report)
+    name = report_cache.cache_name(report)
+    Report.objects.filter(pk=report.id, detail=report.detail).update(pdf=name)
+    return name
+
+
+def test_report_content(report):
+    # used for bulk exports: reads the cached PDF if there is one, but never fills
+    # the cache nor touches its LRU clock or counters, so an export does not evict
+    # the PDFs patients are downloading
+    try:
+        with open(default_storage.path(report_cache.cache_name(report)), 'rb') as file:
+            return file.read()
+    except FileNotFoundError:
+        return draw_test_report(report.detail)
+
+
+def stream_test_report(report):
+    path = report_cache.get(report) or default_storage.path(render_test_report(report))
+    try:
+        file = open(path, 'rb')
+    except FileNotFoundError:
+        # evicted between the lookup and the open
+        file = open(default_storage.path(render_test_report(report)), 'rb')
+    file_name = report_file_name(report.user.username, report.order_id, report.test.title)
+    return FileResponse(file, as_attachment=True, filename=file_name)
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from .models import Doctor
+
+KEY = 'store:schedule:{}'
+TEMPLATE = 'doctor_schedule.html'
+
+
+def build(doctor_id):
+    doctor = Doctor.objects.filter(pk=doctor_id).first()
+    if doctor is None:
+        return None
+    timings = list(doctor.timings.select_related('day').order_by('day_id', 'start'))
+    return {
+        'html': render_to_string(TEMPLATE, {'name': doctor.name(), 'schedule': timings}),
+        'json': {
+            'id': doctor.id,
+            'name': doctor.name(),
+            'schedule': [
+                {
+                    'day': timing.day.name,
+                    'start': timing.convert_to_12_hour(timing.start),
+                    'end': timing.convert_to_12_hour(timing.end),
+                }
+                for timing in timings
+            ],
+        },
+    }
+
+
+def refresh(doctor_id):
+    # Schedules change far less often than they are read, so they are
+    # rendered and formatted here, once per change, rather than per request.
+    schedule = build(doctor_id)
+    if schedule is None:
+        cache.delete(KEY.format(doctor_id))
+    else:
+        cache.set(KEY.format(doctor_id), schedule, timeout=None)
+    return schedule
+
+
+def get(doctor_id):
+    schedule = cache.get(KEY.format(doctor_id))
+    if schedule is None:
+        schedule = refresh(doctor_id)
+    return schedule
@@ -0,0 +1,221 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, Q, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Test
+
+WORD = re.compile(r'[a-z0-9]+')
+
+STOP_WORDS = {'a', 'an', 'and', 'for', 'in', 'of', 'on', 'or', 'the', 'to', 'with', 'test', 'tests'}
+
+# spelling variants and word forms of pathology terms that suffix stripping can't relate
+TERMS = {
+    'haemoglobin': 'hemoglobin',
+    'hb': 'hemoglobin',
+    'haematology': 'hematology',
+    'haemogram': 'hemogram',
+    'thyroidal': 'thyroid',
+    'thyroxine': 't4',
+    'glycated': 'hba1c',
+    'glycosylated': 'hba1c',
+    'sugar': 'glucose',
+    'lipids': 'lipid',
+    'cholesterol': 'lipid',
+    'renal': 'kidney',
+    'hepatic': 'liver',
+    'urinary': 'urine',
+    'urinalysis': 'urine',
+    'diabetic': 'diabetes',
+    'vit': 'vitamin',
+}
+
+SUFFIXES = ['ies', 'ing', 's']
+
+# the weight of a word in the title, relative to one in the description
+TITLE_WEIGHT = 3
+
+# InnoDB's innodb_ft_min_token_size: shorter words are not in the FULLTEXT index
+FULLTEXT_MIN_WORD_LENGTH = 3
+
+
+@lru_cache(maxsize=10000)
+def stem(word):
+    word = TERMS.get(word, word)
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and not word.endswith('ss') and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if suffix == 'ies':
+                word += 'y'
+            break
+    return word
+
+
+def tokenize(text):
+    return [stem(word) for word in WORD.findall((text or '').lower()) if word not in STOP_WORDS]
+
+
+class InvertedIndex:
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.documents = {}
+
+    def add(self, test_id, title, description):
+        self.remove(test_id)
+        terms = Counter(tokenize(description))
+        for term in tokenize(title):
+            terms[term] += TITLE_WEIGHT
+        for term, frequency in terms.items():
+            self.postings[term][test_id] = frequency
+        self.documents[test_id] = terms
+
+    def remove(self, test_id):
+        for term in self.documents.pop(test_id, ()):
+            postings = self.postings[term]
+            postings.pop(test_id, None)
+            if not postings:
+                del self.postings[term]
+
+    def search(self, query):
+        # tf-idf over the query terms; only the postings of those terms are read,
+        # so the cost depends on how common the terms are, not on the catalog size
+        scores = defaultdict(float)
+        count = len(self.documents)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + count / len(postings))
+            for test_id, frequency in postings.items():
+                scores[test_id] += (1 + math.log(frequency)) * idf
+        return sorted(scores, key=lambda test_id: (-scores[test_id], test_id))
+
+
+class InMemorySearchBackend:
+    # Used where the database has no full text index, e.g. SQLite. Every process
+    # keeps its own index; saving or deleting a test updates the local index in
+    # place and bumps a shared version, so other processes rebuild theirs.
+    VERSION_KEY = 'store:search:version'
+
+    def __init__(self):
+        self.index = None
+        self.version = None
+        self.lock = threading.Lock()
+
+    def get_index(self):
+        version = cache.get(self.VERSION_KEY)
+        with self.lock:
+            if self.index is None or version != self.version:
+                index = InvertedIndex()
+                for test_id, title, description in Test.objects.values_list(
+                        'id', 'title', 'description').iterator(chunk_size=2000):
+                    index.add(test_id, title, description)
+                self.index = index
+                self.version = version
+            return self.index
+
+    def bump_version(self):
+        cache.add(self.VERSION_KEY, 0, timeout=None)
+        try:
+            return cache.incr(self.VERSION_KEY)
+        except ValueError:
+            cache.set(self.VERSION_KEY, 1, timeout=None)
+            return 1
+
+    def changed(self, apply):
+        with self.lock:
+            current = cache.get(self.VERSION_KEY)
+            version = self.bump_version()
+            # patch the local index only if no other process changed the catalog since it was built
+            if self.index is not None and current == self.version:
+                apply(self.index)
+                self.version = version
+            else:
+                self.index = None
+
+    def update(self, test):
+        self.changed(lambda index: index.add(test.id, test.title, test.description))
+
+    def remove(self, test_id):
+        self.changed(lambda index: index.remove(test_id))
+
+    def search(self, queryset, query):
+        test_ids = self.get_index().search(query)[:settings.TEST_SEARCH_MAX_RESULTS]
+        if not test_ids:
+            return queryset.none()
+        relevance = Case(*[When(pk=test_id, then=rank) for rank, test_id in enumerate(test_ids)])
+        return queryset.filter(pk__in=test_ids).order_by(relevance)
+
+
+class MySQLFullTextSearchBackend:
+    # Uses the FULLTEXT index on (title, description) from migration 0013, which
+    # InnoDB keeps up to date on every insert, update and delete.
+
+    def update(self, test):
+        pass
+
+    def remove(self, test_id):
+        pass
+
+    def search(self, queryset, query):
+        terms, short_words = boolean_query(query)
+        if not terms and not short_words:
+            return queryset.none()
+        matches = Q()
+        for word in short_words:
+            matches |= Q(title__icontains=word) | Q(description__icontains=word)
+        if not terms:
+            return queryset.filter(matches).order_by('id')
+        relevance = RawSQL(
+            'MATCH (store_test.title, store_test.description) AGAINST (%s IN BOOLEAN MODE)',
+            [terms]
+        )
+        return queryset.annotate(relevance=relevance).filter(matches | Q(relevance__gt=0)).order_by('-relevance', 'id')
+
+
+def boolean_query(query):
+    # The AGAINST string of a query, and its words too short for the FULLTEXT index.
+    # The index holds the raw words, so each word is searched as typed, OR'd with
+    # its stem or synonym; boolean mode lets every form match its longer word forms.
+    groups = []
+    short_words = []
+    for word in dict.fromkeys(WORD.findall(query.lower())):
+        if word in STOP_WORDS:
+            continue
+        if len(word) < FULLTEXT_MIN_WORD_LENGTH:
+            short_words.append(word)
+        forms = [f"{form}*" for form in dict.fromkeys([word, stem(word)]) if len(form) >= FULLTEXT_MIN_WORD_LENGTH]
+        if len(forms) > 1:
+            groups.append(f"({' '.join(forms)})")
+        elif forms:
+            groups.append(forms[0])
+    return ' '.join(groups), short_words
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    backend = getattr(settings, 'TEST_SEARCH_BACKEND', None)
+    if backend:
+        return import_string(backend)()
+    if connection.vendor == 'mysql':
+        return MySQLFullTextSearchBackend()
+    return InMemorySearchBackend()
+
+
+class TestSearchFilter(BaseFilterBackend):
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return get_search_backend().search(queryset, query)
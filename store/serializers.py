@@ -1,25 +1,23 @@
-import datetime
-from django.urls import reverse
 from django.utils.html import format_html
-from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
 from rest_framework import serializers
 
-from . import models
+from . import booking, cart, links, models
 from .models import Order, OrderedTest, Checkup, DoctorForCheckup, TestImage
 
+REPORT_PENDING = mark_safe('<h5 style="color: RED">Pending!</h5>')
+PAYMENT_SUCCESSFUL = mark_safe('<h5 style="color: GREEN">Payment Successfull</h5>')
+PAYMENT_FAILED = '<h5 style="color: RED">Payment Failed</h5><p><a href={}>👉Click Again to Pay!👈</a></p>'
+
 
 class DepartmentSerializer(serializers.ModelSerializer):
     doctors_count = serializers.SerializerMethodField()
 
     def get_doctors_count(self, department: models.Department):
-        url = (
-                reverse('store:doctors-list')
-                + '?'
-                + urlencode({
-                    'department': str(department.id)
-                })
-        )
-        return format_html('<a href={}>{} Doctors</a>', url, department.doctor_set.count())
+        url = links.filter_url('store:doctors-list', department=str(department.id))
+        # 'doctors_count' is annotated by DepartmentViewSet.get_queryset(); a department
+        # that was just created is not annotated, and has no doctors yet
+        return links.html('<a href={}>{} Doctors</a>', url, getattr(department, 'doctors_count', 0))
 
     class Meta:
         model = models.Department
@@ -30,14 +28,10 @@ class CollectionSerializer(serializers.ModelSerializer):
     tests_count = serializers.SerializerMethodField()
 
     def get_tests_count(self, collection: models.Collection):
-        url = (
-                reverse('store:tests-list')
-                + '?'
-                + urlencode({
-                    'collection_id': str(collection.id)
-                })
-        )
-        return format_html('<a href={}>{} Tests</a>', url, collection.test_set.count())
+        url = links.filter_url('store:tests-list', collection_id=str(collection.id))
+        # 'tests_count' is annotated by CollectionViewSet.get_queryset(); a collection
+        # that was just created is not annotated, and has no tests yet
+        return links.html('<a href={}>{} Tests</a>', url, getattr(collection, 'tests_count', 0))
 
     class Meta:
         model = models.Collection
@@ -90,27 +84,15 @@ class TestSerializer(serializers.ModelSerializer):
     #     return html_image_list
 
     def get_title(self, test: models.Test):
-        url = (
-                reverse('store:tests-list')
-                + str(test.id)
-        )
-        return format_html('<a href={}>{}</a>', url, test.title)
+        url = links.object_url('store:tests-list', test.id)
+        return links.html('<a href={}>{}</a>', url, test.title)
 
     def get_reviews(self, test: models.Test):
-        url = (
-                reverse('store:reviews-list')
-                + '?'
-                + urlencode({
-                    'test': str(test.id)
-                })
-        )
-        return format_html('<a href="{}">See Reviews!</a>', url)
+        url = links.filter_url('store:reviews-list', test=str(test.id))
+        return links.html('<a href="{}">See Reviews!</a>', url)
 
     def get_order(self, test: models.Test):
-        url = (
-            reverse('store:orders-list')
-        )
-        return format_html('<a href="{}">⚡Place Order!</a>', url)
+        return links.html('<a href="{}">⚡Place Order!</a>', links.route('store:orders-list'))
 
     def get_collection(self, test: models.Test):
         return test.collection.title
@@ -157,31 +139,33 @@ class DoctorSerializer(serializers.ModelSerializer):
             return ''
 
     def get_name(self, docotor: models.Doctor):
-        url = (
-                reverse('store:doctors-list')
-                + str(docotor.id)
-        )
-        return format_html('<a href={}>{}</a>', url, docotor.name())
+        url = links.object_url('store:doctors-list', docotor.id)
+        return links.html('<a href={}>{}</a>', url, docotor.name())
 
     def get_checkup(self, doctor: models.Doctor):
-        url = (
-            reverse('store:checkups-list')
-        )
-        return format_html('<a href="{}">⚡Book Checkup!</a>', url)
+        return links.html('<a href="{}">⚡Book Checkup!</a>', links.route('store:checkups-list'))
 
     def get_availability(self, doctor: models.Doctor):
-        url = (
-                reverse('store:doctors-list')
-                + str(doctor.id)
-                + str('/schedule/')
-        )
-        return format_html('<a href="{}">See Schedule</a>', url)
+        url = links.object_url('store:doctors-list', doctor.id, 'schedule')
+        return links.html('<a href="{}">See Schedule</a>', url)
 
     class Meta:
         model = models.Doctor
         fields = ['name', 'qualification', 'department', 'availability', 'fees', 'checkup', 'image']
 
 
+class DoctorAvailabilitySerializer(serializers.Serializer):
+    day = serializers.CharField()
+    time = serializers.TimeField()
+    department = serializers.IntegerField(required=False)
+
+    def validate_day(self, value):
+        day = models.Day.objects.filter(name__iexact=value).values_list('id', flat=True).first()
+        if day is None:
+            raise serializers.ValidationError(f"'{value}' is not a day of the schedule.")
+        return day
+
+
 class SimpleDoctorSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Doctor
@@ -190,18 +174,12 @@ class SimpleDoctorSerializer(serializers.ModelSerializer):
 
 class AddOrderedTestSerializer(serializers.ModelSerializer):
     def save(self, **kwargs):
-        user_id = self.context['user_id']
-        test = self.validated_data['test']
-        quantity = OrderedTest.DEFAULT_QUANTITY
-
-        # here one 'order' object will be created for every tests for the user.
-        order = Order.objects.create(user_id=user_id)
-        self.instance = OrderedTest.objects.create(
-            order=order,
-            test=test,
-            quantity=quantity,
-            unit_price=test.unit_price
+        # a one-test cart
+        order = cart.checkout(
+            self.context['user_id'],
+            [(self.validated_data['test'].id, OrderedTest.DEFAULT_QUANTITY)]
         )
+        self.instance = order.tests.get()
         return self.instance
 
     class Meta:
@@ -214,56 +192,67 @@ class OrderedTestSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = models.OrderedTest
-        fields = ['id', 'test']
+        fields = ['id', 'test', 'quantity']
+
+
+class CartItemSerializer(serializers.Serializer):
+    test = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=OrderedTest.DEFAULT_QUANTITY)
+
+
+class CheckoutSerializer(serializers.Serializer):
+    items = CartItemSerializer(many=True, allow_empty=False)
+
+    def save(self, **kwargs):
+        items = [(item['test'], item['quantity']) for item in self.validated_data['items']]
+        try:
+            self.instance = cart.checkout(self.context['user_id'], items)
+        except cart.UnknownTests as error:
+            raise serializers.ValidationError({
+                'items': [f'Test {test_id} does not exist.' for test_id in error.test_ids]
+            })
+        return self.instance
 
 
 class OrderSerializer(serializers.ModelSerializer):
-    tests = OrderedTestSerializer()
+    tests = OrderedTestSerializer(many=True)
     payment_status = serializers.SerializerMethodField()
     total_payable = serializers.SerializerMethodField()
     id = serializers.SerializerMethodField()
     reports = serializers.SerializerMethodField()
 
     def get_reports(self, order: models.Order):
-        try:
-            report = models.Report.objects.get(order_id=order.id)
-            url = (
-                    reverse('store:reports-list')
-                    + str(report.id)
+        # each test of the order gets its own report; OrderViewSet.get_queryset() prefetches them
+        report_ids = {report.test_id: report.id for report in order.reports.all()}
+        if not report_ids:
+            return REPORT_PENDING
+        return mark_safe('<br>'.join(
+            links.html(
+                '<a href="{}" style="color: GREEN">{}: View Report!</a>',
+                links.object_url('store:reports-list', report_ids[ordered.test_id]),
+                ordered.test.title
             )
-            return format_html('<a href="{}" style="color: GREEN">View Report!</a>', url)
-        except models.Report.DoesNotExist:
-            return format_html('<h5 style="color: RED">Pending!</h5>')
+            if ordered.test_id in report_ids else
+            links.html('<span style="color: RED">{}: Pending!</span>', ordered.test.title)
+            for ordered in order.tests.all()
+        ))
 
     def get_id(self, order: models.Order):
-        url = (
-                reverse('store:orders-list')
-                + str(order.id)
-        )
-        return format_html('<a href={}>📌({})</a>', url, order.id)
+        url = links.object_url('store:orders-list', order.id)
+        return links.html('<a href={}>📌({})</a>', url, order.id)
 
     def get_payment_status(self, order: models.Order):
         if order.payment_status == order.PAYMENT_STATUS_PENDING:
-            url = (
-                    reverse('store:orders-list')
-                    + str(order.id)
-                    + str('/payment/')
-            )
-            return format_html('<a href={}>👉Click to Pay!👈</a>', url)
+            url = links.object_url('store:orders-list', order.id, 'payment')
+            return links.html('<a href={}>👉Click to Pay!👈</a>', url)
         elif order.payment_status == order.PAYMENT_STATUS_COMPLETE:
-            return format_html('<h5 style="color: GREEN">Payment Successfull</h5>')
+            return PAYMENT_SUCCESSFUL
         else:
-            url = (
-                    reverse('store:orders-list')
-                    + str(order.id)
-                    + str('/payment/')
-            )
-            pay = format_html('<a href={}>👉Click Again to Pay!👈</a>', url)
-            return format_html('<h5 style="color: RED">Payment Failed</h5><p>{}</p>', pay)
+            url = links.object_url('store:orders-list', order.id, 'payment')
+            return links.html(PAYMENT_FAILED, url)
 
     def get_total_payable(self, order: models.Order):
-        return order.tests.unit_price
-        # return sum([item.unit_price * item.quantity for item in order.tests.all()])
+        return order.total_amount
 
     class Meta:
         model = models.Order
@@ -271,38 +260,34 @@ class OrderSerializer(serializers.ModelSerializer):
 
 
 class AddDoctorForCheckupSerializer(serializers.ModelSerializer):
-    def save(self, **kwargs):
-        user_id = self.context['user_id']
-        doctor = self.validated_data['doctor']
+    timing = serializers.PrimaryKeyRelatedField(
+        queryset=models.Timing.objects.select_related('day'),
+        required=False,
+        write_only=True
+    )
+
+    def validate(self, attrs):
+        timing = attrs.get('timing')
+        if timing is not None and timing.doctor_id != attrs['doctor'].id:
+            raise serializers.ValidationError({'timing': 'This timing belongs to another doctor.'})
+        return attrs
 
+    def save(self, **kwargs):
         try:
-            checkup = Checkup.objects.get(
-                user_id=user_id,
-                booked_at=datetime.date.today(),
-                payment_status=Checkup.PAYMENT_STATUS_PENDING
-            )
-            try:
-                self.instance = DoctorForCheckup.objects.get(checkup=checkup, doctor=doctor)
-                return self.instance
-            except DoctorForCheckup.DoesNotExist:
-                self.instance = DoctorForCheckup.objects.create(
-                    checkup=checkup,
-                    doctor=doctor,
-                    doctor_fees=doctor.fees
-                )
-                return self.instance
-        except Checkup.DoesNotExist:
-            checkup = Checkup.objects.create(user_id=user_id)
-            self.instance = DoctorForCheckup.objects.create(
-                checkup=checkup,
-                doctor=doctor,
-                doctor_fees=doctor.fees
+            self.instance = booking.book(
+                self.context['user_id'],
+                self.validated_data['doctor'],
+                self.validated_data.get('timing')
             )
-            return self.instance
+        except booking.SlotFull:
+            raise serializers.ValidationError({'timing': ['This slot is full, please choose another one.']})
+        except booking.NoTimings:
+            raise serializers.ValidationError({'doctor': ['This doctor has no timings to book.']})
+        return self.instance
 
     class Meta:
         model = models.DoctorForCheckup
-        fields = ['id', 'doctor']
+        fields = ['id', 'doctor', 'timing']
 
 
 class DoctorForCheckupSerializer(serializers.ModelSerializer):
@@ -327,33 +312,21 @@ class CheckupSerializer(serializers.ModelSerializer):
     id = serializers.SerializerMethodField()
 
     def get_id(self, checkup: models.Checkup):
-        url = (
-                reverse('store:orders-list')
-                + str(checkup.id)
-        )
-        return format_html('<a href={}>📌({})</a>', url, checkup.id)
+        url = links.object_url('store:orders-list', checkup.id)
+        return links.html('<a href={}>📌({})</a>', url, checkup.id)
 
     def get_total_payable(self, checkup: models.Checkup):
-        return sum([item.doctor_fees for item in checkup.doctors.all()])
+        return checkup.total_amount
 
     def get_payment_status(self, checkup: models.Checkup):
         if checkup.payment_status == checkup.PAYMENT_STATUS_PENDING:
-            url = (
-                    reverse('store:checkups-list')
-                    + str(checkup.id)
-                    + str('/payment/')
-            )
-            return format_html('<a href={}>👉Click to Pay!👈</a>', url)
+            url = links.object_url('store:checkups-list', checkup.id, 'payment')
+            return links.html('<a href={}>👉Click to Pay!👈</a>', url)
         elif checkup.payment_status == checkup.PAYMENT_STATUS_FAILED:
-            url = (
-                    reverse('store:checkups-list')
-                    + str(checkup.id)
-                    + str('/payment/')
-            )
-            pay = format_html('<a href={}>👉Click Again to Pay!👈</a>', url)
-            return format_html('<h5 style="color: RED">Payment Failed</h5><p>{}</p>', pay)
+            url = links.object_url('store:checkups-list', checkup.id, 'payment')
+            return links.html(PAYMENT_FAILED, url)
         else:
-            return format_html('<h5 style="color: GREEN">Payment Successfull</h5>')
+            return PAYMENT_SUCCESSFUL
 
     class Meta:
         model = models.Checkup
@@ -375,11 +348,8 @@ class QuerySerializer(serializers.ModelSerializer):
     question = serializers.SerializerMethodField()
 
     def get_question(self, query: models.Query):
-        url = (
-                reverse('store:querys-list')
-                + str(query.id)
-        )
-        return format_html('<a href={}>{}</a>', url, query.question)
+        url = links.object_url('store:querys-list', query.id)
+        return links.html('<a href={}>{}</a>', url, query.question)
 
     class Meta:
         model = models.Query
@@ -394,7 +364,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         return review.test.title
 
     def get_name(self, review: models.Review):
-        return review.user
+        return str(review.user)
 
     class Meta:
         model = models.Review
@@ -420,14 +390,11 @@ class ReportSerializer(serializers.ModelSerializer):
     id = serializers.SerializerMethodField()
 
     def get_id(self, report: models.Report):
-        url = (
-                reverse('store:reports-list')
-                + str(report.id)
-        )
-        return format_html('<a href={}>📌({})</a>', url, report.id)
+        url = links.object_url('store:reports-list', report.id)
+        return links.html('<a href={}>📌({})</a>', url, report.id)
 
     def get_order(self, report: models.Report):
-        return report.order.tests.test.title
+        return report.test.title
 
     class Meta:
         model = models.Report
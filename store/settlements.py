@@ -0,0 +1,137 @@
+import csv
+import json
+from collections import Counter, defaultdict
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Checkup, Order
+
+REPORT_FIELDS = ['line', 'kind', 'id', 'reason']
+
+STATUSES = {
+    'settled': Order.PAYMENT_STATUS_COMPLETE,
+    'failed': Order.PAYMENT_STATUS_FAILED,
+}
+
+
+KINDS = {
+    'order': Order,
+    'checkup': Checkup,
+}
+
+
+def read_lines(file, file_format):
+    # yields (line number, row), row being None when the line is unreadable
+    if file_format == 'json':
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield number, row if isinstance(row, dict) else None
+    else:
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def clean(row):
+    # returns (kind, id, status, amount) or raises ValueError with the reason
+    if row is None:
+        raise ValueError('unreadable line')
+    kind = str(row.get('kind') or '').strip().lower()
+    if kind not in KINDS:
+        raise ValueError('unknown kind')
+    status = STATUSES.get(str(row.get('status') or '').strip().lower())
+    if status is None:
+        raise ValueError('unknown status')
+    try:
+        pk = int(row.get('id'))
+        amount = row.get('amount')
+        amount = Decimal(str(amount)) if amount not in (None, '') else None
+    except (TypeError, ValueError, InvalidOperation):
+        raise ValueError('invalid id or amount')
+    return kind, pk, status, amount
+
+
+class Reconciliation:
+    # Matches the lines of a settlement file to orders and checkups, a chunk
+    # at a time: every chunk costs one read per kind, and at most one UPDATE
+    # per kind and status, however many lines it holds.
+
+    def __init__(self, report, chunk_size=None):
+        self.chunk_size = chunk_size or settings.SETTLEMENT_CHUNK_SIZE
+        self.report = csv.writer(report)
+        self.report.writerow(REPORT_FIELDS)
+        self.summary = Counter()
+        self.mismatches = []
+
+    def mismatch(self, number, kind, pk, reason):
+        self.summary['mismatched'] += 1
+        self.mismatches.append([number, kind, pk, reason])
+
+    def run(self, lines):
+        lines = iter(lines)
+        while True:
+            chunk = list(islice(lines, self.chunk_size))
+            if not chunk:
+                return self.summary
+            self.apply(chunk)
+
+    def apply(self, chunk):
+        by_kind = defaultdict(list)
+        for number, row in chunk:
+            self.summary['lines'] += 1
+            try:
+                kind, pk, status, amount = clean(row)
+            except ValueError as error:
+                row = row or {}
+                self.mismatch(number, row.get('kind', ''), row.get('id', ''), str(error))
+                continue
+            by_kind[kind].append((number, pk, status, amount))
+
+        for kind, entries in by_kind.items():
+            model = KINDS[kind]
+            rows = model.objects.filter(pk__in=[pk for _, pk, _, _ in entries]).\
+                values_list('id', 'payment_status', 'total_amount')
+            rows = {pk: (status, total) for pk, status, total in rows}
+            updates = defaultdict(set)
+            for number, pk, status, amount in entries:
+                if pk not in rows:
+                    self.mismatch(number, kind, pk, f'no such {kind}')
+                    continue
+                current, total = rows[pk]
+                if amount is not None and amount != total:
+                    self.mismatch(number, kind, pk, f'amount {amount} differs from {total}')
+                elif current == status:
+                    self.summary['unchanged'] += 1
+                elif current == Order.PAYMENT_STATUS_COMPLETE:
+                    self.mismatch(number, kind, pk, 'already complete')
+                else:
+                    updates[status].add(pk)
+
+            with transaction.atomic():
+                for status, pks in updates.items():
+                    # a payment completed since the read above is never undone
+                    self.summary['updated'] += model.objects.filter(pk__in=pks).\
+                        exclude(payment_status=Order.PAYMENT_STATUS_COMPLETE).\
+                        update(payment_status=status)
+
+        # in the order of the file
+        self.mismatches.sort(key=lambda mismatch: mismatch[0])
+        self.report.writerows(self.mismatches)
+        self.mismatches = []
+
+
+def file_format(path):
+    return 'json' if path.endswith(('.json', '.jsonl')) else 'csv'
+
+
+def reconcile_file(path, report_path, chunk_size=None):
+    with open(path, newline='') as file, open(report_path, 'w', newline='') as report:
+        return Reconciliation(report, chunk_size).run(read_lines(file, file_format(path)))
@@ -0,0 +1,157 @@
+import datetime
+
+from django.core.cache import cache
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from store import availability, booking, catalog_cache, report_cache, schedules, sms, totals
+from store.models import Checkup, Collection, Department, Doctor, DoctorForCheckup, Order, OrderedTest, \
+    Qualification, Report, Test, TestImage, Timing, TimingSlot
+from store.search import get_search_backend
+from store.tasks import rebuild_autocomplete, render_pending_reports, REPORTS_QUEUE
+
+RENDER_SCHEDULED_KEY = 'store:reports:render-scheduled'
+AUTOCOMPLETE_SCHEDULED_KEY = 'store:autocomplete:rebuild-scheduled'
+
+
+@receiver(pre_save, sender=Report)
+def invalidate_report_pdf(sender, instance: Report, **kwargs):
+    # the cache key covers the detail text, so an unchanged report keeps its PDF
+    if instance.pdf and instance.pdf.name != report_cache.cache_name(instance):
+        report_cache.discard(instance.pdf.name)
+        instance.pdf = ''
+        instance.render_queued_at = None
+
+
+@receiver(post_save, sender=Report)
+def notify_report_ready(sender, instance: Report, created, **kwargs):
+    if created:
+        sms.notify(instance.user.phone, f"Your {instance.test.title} report is ready. Order #{instance.order_id}.")
+
+
+@receiver(post_save, sender=Report)
+def schedule_report_rendering(sender, instance: Report, **kwargs):
+    if instance.pdf:
+        return
+    transaction.on_commit(schedule_pending_reports)
+
+
+def schedule_pending_reports():
+    # reports saved within one window are rendered together by a single batch run;
+    # the flag is only set once the report is committed, so a rollback schedules nothing
+    window = settings.REPORT_RENDER_BATCH_WINDOW
+    if cache.add(RENDER_SCHEDULED_KEY, True, timeout=window):
+        render_pending_reports.apply_async(countdown=window, queue=REPORTS_QUEUE)
+
+
+@receiver(post_save, sender=Test)
+def update_search_index(sender, instance: Test, **kwargs):
+    # after the commit, so no process rebuilds its index from the old rows under the new version
+    transaction.on_commit(lambda: get_search_backend().update(instance))
+
+
+@receiver(post_delete, sender=Test)
+def remove_from_search_index(sender, instance: Test, **kwargs):
+    test_id = instance.id
+    transaction.on_commit(lambda: get_search_backend().remove(test_id))
+
+
+@receiver(post_save, sender=Test)
+@receiver(post_delete, sender=Test)
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def update_autocomplete_snapshot(sender, **kwargs):
+    transaction.on_commit(schedule_autocomplete_rebuild)
+
+
+def schedule_autocomplete_rebuild():
+    # one rebuild for every test and doctor saved within the window, off the request
+    window = settings.AUTOCOMPLETE_REBUILD_WINDOW
+    if cache.add(AUTOCOMPLETE_SCHEDULED_KEY, True, timeout=window):
+        rebuild_autocomplete.apply_async(countdown=window)
+
+
+def invalidate_catalog_cache(sender, **kwargs):
+    # after the commit, so no request caches the old rows under the new version
+    transaction.on_commit(lambda: catalog_cache.model_changed(sender.__name__))
+
+
+for model in [Test, TestImage, Collection, Doctor, Timing, Qualification, Department]:
+    post_save.connect(invalidate_catalog_cache, sender=model)
+    post_delete.connect(invalidate_catalog_cache, sender=model)
+
+
+@receiver(pre_save, sender=Timing)
+def remember_timing_day(sender, instance: Timing, **kwargs):
+    # a timing moved to another day or doctor leaves its old day and schedule too
+    if instance.pk:
+        instance.previous_day_id, instance.previous_doctor_id = Timing.objects.filter(pk=instance.pk).\
+            values_list('day_id', 'doctor_id').first() or (None, None)
+
+
+@receiver(post_save, sender=Timing)
+@receiver(post_delete, sender=Timing)
+def update_availability(sender, instance: Timing, **kwargs):
+    day_ids = {instance.day_id, getattr(instance, 'previous_day_id', None)} - {None}
+    transaction.on_commit(lambda: availability.days_changed(day_ids))
+
+
+@receiver(post_save, sender=Doctor)
+def update_doctor_availability(sender, instance: Doctor, created, **kwargs):
+    # the index files doctors under their department
+    if not created:
+        day_ids = set(instance.timings.values_list('day_id', flat=True))
+        transaction.on_commit(lambda: availability.days_changed(day_ids))
+
+
+@receiver(post_save, sender=Timing)
+@receiver(post_delete, sender=Timing)
+def refresh_timing_schedule(sender, instance: Timing, **kwargs):
+    doctor_ids = {instance.doctor_id, getattr(instance, 'previous_doctor_id', None)} - {None}
+    for doctor_id in doctor_ids:
+        transaction.on_commit(lambda doctor_id=doctor_id: schedules.refresh(doctor_id))
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def refresh_doctor_schedule(sender, instance: Doctor, **kwargs):
+    # the schedule shows the doctor's name; a deleted doctor's schedule is dropped
+    doctor_id = instance.id
+    transaction.on_commit(lambda: schedules.refresh(doctor_id))
+
+
+@receiver(post_save, sender=Timing)
+def update_slot_capacity(sender, instance: Timing, created, **kwargs):
+    # places already booked stay booked, even above a lowered capacity
+    if not created:
+        TimingSlot.objects.filter(timing=instance, date__gte=datetime.date.today()).update(capacity=instance.capacity)
+
+
+@receiver(post_delete, sender=DoctorForCheckup)
+def release_checkup_slot(sender, instance: DoctorForCheckup, **kwargs):
+    if instance.slot_id is not None:
+        booking.release(instance.slot_id)
+
+
+@receiver(post_save, sender=OrderedTest)
+@receiver(post_delete, sender=OrderedTest)
+def update_order_totals(sender, instance: OrderedTest, **kwargs):
+    totals.refresh(Order, [instance.order_id])
+
+
+@receiver(post_save, sender=DoctorForCheckup)
+@receiver(post_delete, sender=DoctorForCheckup)
+def update_checkup_totals(sender, instance: DoctorForCheckup, **kwargs):
+    totals.refresh(Checkup, [instance.checkup_id])
+
+
+@receiver(post_save, sender=DoctorForCheckup)
+def notify_checkup_booked(sender, instance: DoctorForCheckup, created, **kwargs):
+    if created:
+        when = f" on {instance.slot.date:%d %b}" if instance.slot_id else ''
+        sms.notify(
+            instance.checkup.user.phone,
+            f"Your checkup with Dr. {instance.doctor.first_name} {instance.doctor.last_name}{when} is booked."
+        )
@@ -0,0 +1,169 @@
+import datetime
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import TextMessage
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED_KEY = 'store:sms:flush-scheduled'
+FLUSH_LOCK_KEY = 'store:sms:flush-lock'
+
+
+class BaseTransport:
+    def send(self, phone, body):
+        raise NotImplementedError
+
+
+class TwilioTransport(BaseTransport):
+    def __init__(self):
+        # imported here, so only the processes that send SMS load twilio
+        from twilio.rest import Client
+
+        self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+
+    def send(self, phone, body):
+        self.client.messages.create(to=phone, from_=settings.TWILIO_FROM_NUMBER, body=body)
+
+
+class ConsoleTransport(BaseTransport):
+    def send(self, phone, body):
+        logger.info('SMS to %s: %s', phone, body)
+
+
+class LocmemTransport(BaseTransport):
+    # keeps the messages in sms.outbox, like the locmem mail backend does
+    def send(self, phone, body):
+        outbox.append((phone, body))
+
+
+outbox = []
+
+
+@lru_cache(maxsize=None)
+def get_transport():
+    return import_string(settings.SMS_BACKEND)()
+
+
+class TokenBucket:
+    # Allows `rate` sends a second on average, and bursts of up to `capacity`.
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self):
+        with self.lock:
+            self.refill()
+            if self.tokens < 1:
+                self.sleep((1 - self.tokens) / self.rate)
+                self.refill()
+            self.tokens -= 1
+
+
+bucket = None
+
+
+def get_bucket():
+    global bucket
+    if bucket is None:
+        bucket = TokenBucket(settings.SMS_RATE, settings.SMS_BURST)
+    return bucket
+
+
+def international(phone):
+    return phone if phone.startswith('+') else settings.SMS_COUNTRY_CODE + phone
+
+
+def notify(phone, body):
+    # Queues an SMS. It is written in the caller's transaction, so a rolled
+    # back booking or payment sends nothing; every SMS queued within one
+    # window is sent by the same flush.
+    if not phone:
+        return
+    TextMessage.objects.create(phone=international(phone), body=body)
+    transaction.on_commit(schedule_flush)
+
+
+def schedule_flush():
+    # the flag is only set once the message is committed, so a rollback does not
+    # leave the window flagged with no flush scheduled
+    window = settings.SMS_BATCH_WINDOW
+    if cache.add(SCHEDULED_KEY, True, timeout=window):
+        from .tasks import SMS_QUEUE, send_pending_sms
+
+        send_pending_sms.apply_async(countdown=window, queue=SMS_QUEUE)
+
+
+def coalesce(messages):
+    # one SMS per phone, holding all of its messages in the order they were queued
+    by_phone = OrderedDict()
+    for message_id, phone, body in messages:
+        ids, bodies = by_phone.setdefault(phone, ([], []))
+        ids.append(message_id)
+        bodies.append(body)
+    return [(phone, ids, '\n'.join(bodies)) for phone, (ids, bodies) in by_phone.items()]
+
+
+def pending():
+    # unsent messages that no flush is sending; a claim older than the lock
+    # timeout belongs to a flush that died
+    stale = timezone.now() - datetime.timedelta(seconds=settings.SMS_FLUSH_LOCK_TIMEOUT)
+    return TextMessage.objects.filter(Q(claimed_at=None) | Q(claimed_at__lt=stale), sent_at=None)
+
+
+def flush(batch_size=None):
+    # Sends one batch of the outbox. Returns the number of SMS sent, or None
+    # when another flush is already running.
+    batch_size = batch_size or settings.SMS_BATCH_SIZE
+    token = uuid.uuid4().hex
+    if not cache.add(FLUSH_LOCK_KEY, token, timeout=settings.SMS_FLUSH_LOCK_TIMEOUT):
+        return None
+    try:
+        # claimed with a conditional UPDATE, so even a flush that outlived its
+        # lock can't send the same messages as the next one
+        now = timezone.now()
+        ids = list(pending().order_by('id').values_list('id', flat=True)[:batch_size])
+        pending().filter(pk__in=ids).update(claimed_at=now)
+        claimed = TextMessage.objects.filter(pk__in=ids, claimed_at=now, sent_at=None).order_by('id')
+
+        transport = get_transport()
+        limiter = get_bucket()
+        sent = 0
+        try:
+            for phone, message_ids, body in coalesce(claimed.values_list('id', 'phone', 'body')):
+                limiter.take()
+                transport.send(phone, body)
+                # marked one phone at a time, so a failure never sends a message twice
+                TextMessage.objects.filter(pk__in=message_ids).update(sent_at=timezone.now())
+                sent += 1
+        except Exception:
+            # the unsent messages go back to the outbox, for the retry
+            claimed.update(claimed_at=None)
+            raise
+        return sent
+    finally:
+        # the lock may have expired and been taken by another flush, which keeps it
+        if cache.get(FLUSH_LOCK_KEY) == token:
+            cache.delete(FLUSH_LOCK_KEY)
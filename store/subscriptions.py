@@ -0,0 +1,73 @@
+import hashlib
+import math
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import Subscribe
+
+
+class BloomFilter:
+    # A set of strings in a fixed number of bits. "Not in it" is always
+    # right; "in it" is wrong for about error_rate of the strings never added.
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, value):
+        # double hashing: the k positions come from the two halves of one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + index * second) % self.size for index in range(self.hashes))
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(value))
+
+
+class KnownEmails:
+    # The subscribed emails, loaded into a Bloom filter by every process the
+    # first time someone subscribes. Emails subscribed through other
+    # processes are missing from it, which only costs them the cheap check.
+
+    def __init__(self):
+        self.filter = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        with self.lock:
+            if self.filter is None:
+                bloom = BloomFilter(settings.SUBSCRIBERS_BLOOM_CAPACITY, settings.SUBSCRIBERS_BLOOM_ERROR_RATE)
+                for email in Subscribe.objects.values_list('email', flat=True).iterator(chunk_size=10000):
+                    bloom.add(email)
+                self.filter = bloom
+            return self.filter
+
+    def clear(self):
+        with self.lock:
+            self.filter = None
+
+
+known_emails = KnownEmails()
+
+
+def subscribe(name, email):
+    # Returns False when the email is already subscribed. The unique index on
+    # email decides; the filter only spares known emails the INSERT.
+    emails = known_emails.get()
+    if email in emails and Subscribe.objects.filter(email=email).exists():
+        return False
+    try:
+        with transaction.atomic():
+            Subscribe.objects.create(name=name, email=email)
+        return True
+    except IntegrityError:
+        return False
+    finally:
+        emails.add(email)
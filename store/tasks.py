@@ -0,0 +1,127 @@
+import smtplib
+
+import datetime
+
+from celery import group, shared_task
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from kombu.exceptions import ChannelError, OperationalError
+
+from . import autocomplete, newsletter, payments, sms
+from .celery import celery
+from .models import Report
+from .reports import save_test_report
+from .settlements import reconcile_file
+
+REPORTS_QUEUE = 'reports'
+NEWSLETTER_QUEUE = 'newsletter'
+SMS_QUEUE = 'sms'
+
+
+@shared_task
+def render_reports(report_ids):
+    queryset = Report.objects.filter(pk__in=report_ids).only('id', 'detail')
+    for report in queryset:
+        save_test_report(report)
+    return len(report_ids)
+
+
+@shared_task
+def render_pending_reports():
+    batch_size = settings.REPORT_RENDER_BATCH_SIZE
+    now = timezone.now()
+    # claims the reports before queueing them, so a report whose render is still
+    # queued or running is not rendered twice; one that never finished is retried
+    stale = now - datetime.timedelta(seconds=settings.REPORT_RENDER_TIMEOUT)
+    Report.objects.filter(Q(render_queued_at=None) | Q(render_queued_at__lt=stale), pdf='').\
+        update(render_queued_at=now)
+    pending = Report.objects.filter(pdf='', render_queued_at=now).order_by('id').values_list('id', flat=True)
+
+    batch = []
+    batches = []
+    for report_id in pending.iterator(chunk_size=batch_size):
+        batch.append(report_id)
+        if len(batch) == batch_size:
+            batches.append(render_reports.s(batch))
+            batch = []
+    if batch:
+        batches.append(render_reports.s(batch))
+
+    # every batch is a separate message, so the worker pool renders them in parallel
+    if batches:
+        group(batches).apply_async(queue=REPORTS_QUEUE)
+    return len(batches)
+
+
+@shared_task
+def rebuild_autocomplete():
+    autocomplete.rebuild()
+
+
+@shared_task
+def purge_idempotency_keys():
+    return payments.purge_idempotency_keys()
+
+
+@shared_task
+def reconcile_settlement(path, report_path):
+    return dict(reconcile_file(path, report_path))
+
+
+@shared_task
+def send_newsletter(context, template_name=newsletter.TEMPLATE):
+    batches = [
+        send_newsletter_batch.s(context, after_id, last_id, template_name)
+        for after_id, last_id in newsletter.batch_bounds(settings.NEWSLETTER_BATCH_SIZE)
+    ]
+    # every batch is a separate message, so the newsletter workers share them
+    if batches:
+        group(batches).apply_async(queue=NEWSLETTER_QUEUE)
+    return len(batches)
+
+
+@shared_task(bind=True, max_retries=5)
+def send_newsletter_batch(self, context, after_id, last_id, template_name=newsletter.TEMPLATE):
+    sent_up_to = after_id
+
+    def progress(subscriber_id):
+        nonlocal sent_up_to
+        sent_up_to = subscriber_id
+
+    try:
+        return newsletter.send_batch(context, after_id, last_id, template_name, progress)
+    except (smtplib.SMTPException, OSError) as error:
+        newsletter.mailer.close()
+        # the retry resumes after the last subscriber who got the newsletter
+        raise self.retry(
+            exc=error,
+            args=(context, sent_up_to, last_id, template_name),
+            countdown=settings.NEWSLETTER_RETRY_DELAY * 2 ** self.request.retries
+        )
+
+
+@shared_task(autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def send_pending_sms():
+    # a failed send leaves its messages in the outbox, for the retry
+    sent = sms.flush()
+    if sent is None:
+        # another worker is flushing; look again once it is likely done
+        send_pending_sms.apply_async(countdown=settings.SMS_BATCH_WINDOW, queue=SMS_QUEUE)
+    elif sms.pending().exists():
+        # one batch per task, so no task outlives the flush lock
+        send_pending_sms.apply_async(queue=SMS_QUEUE)
+    return sent
+
+
+def reports_queue_depth():
+    try:
+        with celery.connection_for_read() as connection:
+            # a stats page should report a missing broker, not wait for it
+            connection.ensure_connection(max_retries=1, interval_start=0)
+            return connection.default_channel.queue_declare(
+                queue=REPORTS_QUEUE,
+                passive=True
+            ).message_count
+    except (OperationalError, ChannelError):
+        return None
@@ -0,0 +1,74 @@
+import time
+from contextlib import contextmanager
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from core.models import User
+from store import availability, newsletter, sms, subscriptions, tasks
+from store.search import get_search_backend
+
+
+@pytest.fixture(autouse=True)
+def clear_caches(settings, tmp_path):
+    # rolled back rows never reach the signal handlers, so state derived from
+    # them must not leak from one test into the next
+    cache.clear()
+    get_search_backend.cache_clear()
+    availability.index.days.clear()
+    subscriptions.known_emails.clear()
+    newsletter.mailer.close()
+    sms.get_transport.cache_clear()
+    sms.outbox.clear()
+    settings.AUTOCOMPLETE_SNAPSHOT = str(tmp_path / 'autocomplete.snapshot')
+    # rendered report PDFs are written under MEDIA_ROOT
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+
+
+@pytest.fixture(autouse=True)
+def autocomplete_rebuilds(monkeypatch):
+    # saving a test or a doctor queues a rebuild, which needs no broker here
+    countdowns = []
+    monkeypatch.setattr(tasks.rebuild_autocomplete, 'apply_async',
+                        lambda countdown=None, **kwargs: countdowns.append(countdown))
+    return countdowns
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def authenticate(api_client):
+    # the viewsets use Django's LoginRequiredMixin, so a real session is needed
+    def do_authenticate(is_staff=False):
+        user = baker.make(User, is_staff=is_staff)
+        api_client.force_login(user)
+        return user
+    return do_authenticate
+
+
+@pytest.fixture
+def assert_budget():
+    # Fails when a request runs more queries or takes longer than allowed,
+    # and always lists the SQL that was run, so the N+1 is visible in CI.
+    @contextmanager
+    def do_assert(max_queries, max_seconds):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            yield
+            elapsed = time.perf_counter() - start
+
+        queries = '\n'.join(
+            f"{index}. {query['sql']}" for index, query in enumerate(context.captured_queries, start=1)
+        )
+        assert len(context) <= max_queries, \
+            f"Expected at most {max_queries} queries, {len(context)} were done:\n{queries}"
+        assert elapsed <= max_seconds, \
+            f"Expected at most {max_seconds}s, took {elapsed:.3f}s with {len(context)} queries:\n{queries}"
+    return do_assert
@@ -0,0 +1,117 @@
+import pytest
+from model_bakery import baker
+from rest_framework import status
+
+from store import autocomplete, models, tasks
+
+
+def snapshot(path, *objects):
+    # objects are (kind, id, label, popularity, *values to key on)
+    autocomplete.write_snapshot(path, sorted(
+        (key, kind, object_id, label, popularity)
+        for kind, object_id, label, popularity, *values in objects
+        for key in autocomplete.keys_of(*values)
+    ))
+    return autocomplete.SnapshotIndex(path)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return snapshot(
+        str(tmp_path / 'snapshot'),
+        (autocomplete.KIND_TEST, 1, 'Thyroid Profile [TSH3]', 0, 'Thyroid Profile', 'TSH3'),
+        (autocomplete.KIND_TEST, 2, 'Glycated Haemoglobin [HBA1C]', 0, 'Glycated Haemoglobin', 'HBA1C'),
+        (autocomplete.KIND_DOCTOR, 1, 'Dr. Asha Sharma', 0, 'Asha Sharma', 'Asha', 'Sharma'),
+    )
+
+
+@pytest.fixture
+def rebuilds(monkeypatch, autocomplete_rebuilds):
+    # the countdowns of every rebuild handed to the broker, which run at once
+    def apply_async(countdown=None, **kwargs):
+        autocomplete_rebuilds.append(countdown)
+        tasks.rebuild_autocomplete()
+    monkeypatch.setattr(tasks.rebuild_autocomplete, 'apply_async', apply_async)
+    return autocomplete_rebuilds
+
+
+def labels(results):
+    return [result['label'] for result in results]
+
+
+class TestSnapshotIndex:
+    def test_matches_the_prefix_of_any_word(self, index):
+        assert labels(index.search('prof', 10)) == ['Thyroid Profile [TSH3]']
+        assert labels(index.search('Dr. Sha', 10)) == ['Dr. Asha Sharma']
+        assert labels(index.search('hba', 10)) == ['Glycated Haemoglobin [HBA1C]']
+
+    def test_falls_back_to_trigrams_for_infixes_and_typos(self, index):
+        assert labels(index.search('a1c', 10)) == ['Glycated Haemoglobin [HBA1C]']
+        assert 'Thyroid Profile [TSH3]' in labels(index.search('thyriod', 10))
+
+    def test_returns_each_object_once_and_at_most_limit(self, index):
+        assert labels(index.search('sharma asha', 10)) == ['Dr. Asha Sharma']
+        assert len(index.search('s', 1)) == 1
+
+    def test_ranks_exact_matches_then_popular_then_short_labels(self, tmp_path):
+        index = snapshot(
+            str(tmp_path / 'snapshot'),
+            (autocomplete.KIND_TEST, 1, 'Lipid Profile [LIPID]', 0, 'Lipid Profile', 'LIPID'),
+            (autocomplete.KIND_TEST, 2, 'Lipidogram [LPG]', 40, 'Lipidogram', 'LPG'),
+            (autocomplete.KIND_TEST, 3, 'Lipase [LIPASE]', 0, 'Lipase', 'LIPASE'),
+        )
+
+        assert labels(index.search('lipid', 10)) == ['Lipid Profile [LIPID]', 'Lipidogram [LPG]']
+        assert labels(index.search('lip', 10)) == ['Lipidogram [LPG]', 'Lipase [LIPASE]', 'Lipid Profile [LIPID]']
+        assert labels(index.search('lip', 1)) == ['Lipidogram [LPG]']
+
+    def test_reads_the_trigram_postings_from_the_snapshot(self, index):
+        # a posting points at the first record of the object
+        assert [index.record(position)[3] for position in index.postings('a1c')] == ['Glycated Haemoglobin [HBA1C]']
+        assert index.postings('zzz') == ()
+
+
+@pytest.mark.django_db
+class TestAutocomplete:
+    def test_links_tests_and_doctors(self, api_client):
+        test = baker.make(models.Test, title='Vitamin D', code='VITD', unit_price=100)
+        doctor = baker.make(models.Doctor, first_name='Vikram', last_name='Rao')
+
+        response = api_client.get('/store/autocomplete/?q=vi')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(response.json()['results'], key=lambda result: result['type']) == [
+            {'type': 'doctor', 'id': doctor.id, 'label': 'Dr. Vikram Rao', 'url': f'/store/doctors/{doctor.id}'},
+            {'type': 'test', 'id': test.id, 'label': 'Vitamin D [VITD]', 'url': f'/store/tests/{test.id}'},
+        ]
+
+    def test_finds_tests_saved_after_the_snapshot_was_written(self, api_client, rebuilds,
+                                                              django_capture_on_commit_callbacks):
+        api_client.get('/store/autocomplete/?q=lipid')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(models.Test, title='Lipid Profile', code='LIPID', unit_price=100)
+            baker.make(models.Test, title='Lipase', code='LIPASE', unit_price=100)
+        response = api_client.get('/store/autocomplete/?q=lipid')
+
+        assert labels(response.json()['results']) == ['Lipid Profile [LIPID]']
+
+    def test_saves_within_the_window_are_rebuilt_once(self, settings, autocomplete_rebuilds,
+                                                      django_capture_on_commit_callbacks):
+        settings.AUTOCOMPLETE_REBUILD_WINDOW = 30
+
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(models.Test, unit_price=100)
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(models.Doctor)
+
+        assert autocomplete_rebuilds == [30]
+
+    def test_ranks_the_most_ordered_tests_first(self, api_client):
+        baker.make(models.Test, title='Lipase', code='LIPASE', unit_price=100)
+        lipid = baker.make(models.Test, title='Lipid Profile', code='LIPID', unit_price=100)
+        baker.make(models.OrderedTest, test=lipid, _quantity=2)
+
+        response = api_client.get('/store/autocomplete/?q=lip')
+
+        assert labels(response.json()['results']) == ['Lipid Profile [LIPID]', 'Lipase [LIPASE]']
@@ -0,0 +1,78 @@
+import datetime
+
+import pytest
+from model_bakery import baker
+from rest_framework import status
+
+from store import models
+from store.availability import DayIndex
+
+
+def at(value):
+    return datetime.time.fromisoformat(value)
+
+
+class TestDayIndex:
+    def test_finds_doctors_working_through_a_time(self):
+        index = DayIndex([
+            (1, 10, at('09:00'), at('13:00')),
+            (2, 10, at('12:00'), at('18:00')),
+            (3, 20, at('17:00'), at('21:00')),
+        ])
+
+        assert index.available(8 * 60 + 59) == set()
+        assert index.available(12 * 60 + 30) == {1, 2}
+        assert index.available(13 * 60) == {2}
+        assert index.available(17 * 60 + 30) == {2, 3}
+        assert index.available(17 * 60 + 30, department_id=20) == {3}
+        assert index.available(21 * 60) == set()
+
+    def test_shifts_past_midnight_run_to_the_end_of_the_day(self):
+        index = DayIndex([(1, 10, at('22:00'), at('02:00'))])
+
+        assert index.available(23 * 60 + 59) == {1}
+
+
+@pytest.mark.django_db
+class TestAvailableDoctors:
+    @pytest.fixture
+    def monday(self):
+        return baker.make(models.Day, name='Monday')
+
+    def get_names(self, api_client, query):
+        response = api_client.get(f'/store/doctors/available/?{query}')
+        assert response.status_code == status.HTTP_200_OK
+        return response.content.decode()
+
+    def test_filters_by_day_time_and_department(self, api_client, monday):
+        cardiology, neurology = baker.make(models.Department, _quantity=2)
+        evening = baker.make(models.Doctor, first_name='Evening', department=cardiology)
+        morning = baker.make(models.Doctor, first_name='Morning', department=cardiology)
+        neurologist = baker.make(models.Doctor, first_name='Neuro', department=neurology)
+        baker.make(models.Timing, doctor=evening, day=monday, start=at('16:00'), end=at('20:00'))
+        baker.make(models.Timing, doctor=morning, day=monday, start=at('08:00'), end=at('12:00'))
+        baker.make(models.Timing, doctor=neurologist, day=monday, start=at('16:00'), end=at('20:00'))
+
+        content = self.get_names(api_client, f'department={cardiology.id}&day=monday&time=17:30')
+
+        assert 'Evening' in content
+        assert 'Morning' not in content
+        assert 'Neuro' not in content
+
+    def test_rebuilds_the_day_when_timings_change(self, api_client, monday, django_capture_on_commit_callbacks):
+        tuesday = baker.make(models.Day, name='Tuesday')
+        doctor = baker.make(models.Doctor, first_name='Moving')
+        timing = baker.make(models.Timing, doctor=doctor, day=monday, start=at('09:00'), end=at('17:00'))
+        assert 'Moving' in self.get_names(api_client, 'day=Monday&time=10:00')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            timing.day = tuesday
+            timing.save()
+
+        assert 'Moving' not in self.get_names(api_client, 'day=Monday&time=10:00')
+        assert 'Moving' in self.get_names(api_client, 'day=Tuesday&time=10:00')
+
+    def test_rejects_unknown_days(self, api_client, monday):
+        response = api_client.get('/store/doctors/available/?day=Someday&time=10:00')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
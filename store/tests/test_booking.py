@@ -0,0 +1,180 @@
+import datetime
+import threading
+import time
+
+import pytest
+from django.db import connection, OperationalError
+from model_bakery import baker
+from rest_framework import status
+
+from core.models import User
+from store import booking, models
+
+STRESS_THREADS = 16
+STRESS_BOOKINGS = 200
+
+
+@pytest.fixture
+def doctor():
+    return baker.make(models.Doctor, fees=500)
+
+
+@pytest.fixture
+def make_timing(doctor):
+    def do_make_timing(day_name='Monday', start=datetime.time(9), capacity=20):
+        day = models.Day.objects.get_or_create(name=day_name)[0]
+        return baker.make(
+            models.Timing,
+            doctor=doctor,
+            day=day,
+            start=start,
+            end=datetime.time(start.hour + 4),
+            capacity=capacity
+        )
+    return do_make_timing
+
+
+@pytest.mark.django_db
+class TestBook:
+    def test_reuses_todays_checkup_and_existing_bookings(self, doctor, make_timing):
+        user = baker.make(User)
+        make_timing()
+        other_doctor = baker.make(models.Doctor, fees=300)
+        baker.make(models.Timing, doctor=other_doctor, day=models.Day.objects.get(), start=datetime.time(9),
+                   end=datetime.time(10))
+
+        first = booking.book(user.id, doctor)
+        again = booking.book(user.id, doctor)
+        other = booking.book(user.id, other_doctor)
+
+        assert first == again
+        assert other.checkup == first.checkup
+        assert models.TimingSlot.objects.get(timing__doctor=doctor).booked == 1
+
+    def test_falls_back_to_the_next_timing_with_room(self, doctor, make_timing):
+        full = make_timing(start=datetime.time(9), capacity=1)
+        later = make_timing(start=datetime.time(14), capacity=1)
+        booking.book(baker.make(User).id, doctor)
+
+        second = booking.book(baker.make(User).id, doctor)
+
+        assert second.slot.timing == later
+        assert models.TimingSlot.objects.get(timing=full).booked == 1
+        with pytest.raises(booking.SlotFull):
+            booking.book(baker.make(User).id, doctor)
+
+    def test_cancelled_bookings_free_their_place(self, doctor, make_timing):
+        make_timing(capacity=1)
+        first = booking.book(baker.make(User).id, doctor)
+
+        first.delete()
+
+        assert booking.book(baker.make(User).id, doctor).slot == first.slot
+
+    def test_slots_fall_on_the_timings_weekday(self, doctor, make_timing):
+        timing = make_timing(day_name='Friday')
+
+        slot = booking.book(baker.make(User).id, doctor, timing).slot
+
+        assert slot.date.weekday() == 4
+        assert 0 <= (slot.date - datetime.date.today()).days <= 7
+
+    def test_a_timing_that_is_over_is_booked_next_week(self, make_timing):
+        timing = make_timing(day_name='Monday', start=datetime.time(9))
+        monday = datetime.date(2026, 10, 19)
+
+        during = booking.next_timing_date(timing, datetime.datetime.combine(monday, datetime.time(12)))
+        after = booking.next_timing_date(timing, datetime.datetime.combine(monday, datetime.time(13)))
+
+        assert during == monday
+        assert after == monday + datetime.timedelta(days=7)
+
+    def test_a_doctor_without_timings_cannot_be_booked(self, doctor):
+        with pytest.raises(booking.NoTimings):
+            booking.book(baker.make(User).id, doctor)
+
+
+@pytest.mark.django_db
+class TestBookCheckup:
+    def test_full_slot_is_a_bad_request(self, api_client, authenticate, doctor, make_timing):
+        timing = make_timing(capacity=1)
+        booking.book(baker.make(User).id, doctor, timing)
+        authenticate()
+
+        response = api_client.post('/store/checkups/', {'doctor': doctor.id, 'timing': timing.id})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {'timing': ['This slot is full, please choose another one.']}
+
+    def test_a_doctor_without_timings_is_a_bad_request(self, api_client, authenticate, doctor):
+        authenticate()
+
+        response = api_client.post('/store/checkups/', {'doctor': doctor.id})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {'doctor': ['This doctor has no timings to book.']}
+
+    def test_timing_must_belong_to_the_doctor(self, api_client, authenticate, doctor, make_timing):
+        timing = make_timing()
+        authenticate()
+
+        response = api_client.post('/store/checkups/', {'doctor': baker.make(models.Doctor).id, 'timing': timing.id})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentBooking:
+    def run_concurrently(self, function, arguments):
+        errors = []
+        lock = threading.Lock()
+        queue = list(arguments)
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        if not queue:
+                            return
+                        argument = queue.pop()
+                    while True:
+                        try:
+                            function(argument)
+                            break
+                        except booking.SlotFull:
+                            break
+                        except OperationalError:
+                            # SQLite has no row locks; it fails writers that wait too long
+                            time.sleep(0.001)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(STRESS_THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+
+    def test_never_books_more_than_the_capacity(self, doctor, make_timing):
+        capacity = STRESS_BOOKINGS // 2
+        timing = make_timing(capacity=capacity)
+        users = baker.make(User, _quantity=STRESS_BOOKINGS)
+
+        self.run_concurrently(lambda user: booking.book(user.id, doctor, timing), users)
+
+        slot = models.TimingSlot.objects.get(timing=timing)
+        assert slot.booked == capacity
+        assert models.DoctorForCheckup.objects.filter(slot=slot).count() == capacity
+
+    def test_one_checkup_per_user_and_day(self, doctor, make_timing):
+        make_timing(capacity=STRESS_BOOKINGS)
+        user = baker.make(User)
+
+        self.run_concurrently(lambda _: booking.book(user.id, doctor), range(STRESS_BOOKINGS))
+
+        assert models.Checkup.objects.filter(user=user).count() == 1
+        assert models.DoctorForCheckup.objects.filter(checkup__user=user).count() == 1
+        assert models.TimingSlot.objects.get().booked == 1
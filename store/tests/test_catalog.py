@@ -0,0 +1,76 @@
+import tracemalloc
+
+import pytest
+from django.core.cache import cache
+from model_bakery import baker
+from rest_framework import status
+
+from store import models
+
+TESTS_PER_COLLECTION = 2000
+DOCTORS_PER_DEPARTMENT = 1000
+
+
+@pytest.fixture
+def peak_memory():
+    def do_measure(function):
+        tracemalloc.start()
+        try:
+            result = function()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return result, peak
+    return do_measure
+
+
+@pytest.mark.django_db
+class TestListCollections:
+    def test_reads_annotated_counts(self, api_client, peak_memory, django_assert_max_num_queries):
+        collections = baker.make(models.Collection, _quantity=3)
+        for collection in collections:
+            baker.make(
+                models.Test,
+                collection=collection,
+                unit_price=100,
+                _quantity=TESTS_PER_COLLECTION,
+                _bulk_create=True
+            )
+
+        # the first request loads templates and renderer state once per process
+        api_client.get('/store/collections/')
+        # measure the database and serializers, not a cached response
+        cache.clear()
+        # the list and the aggregate behind its ETag
+        with django_assert_max_num_queries(2):
+            response, peak = peak_memory(lambda: api_client.get('/store/collections/'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert f'{TESTS_PER_COLLECTION} Tests' in response.content.decode()
+        # loading the tests themselves would take megabytes
+        assert peak < 1024 * 1024
+
+
+@pytest.mark.django_db
+class TestListDepartments:
+    def test_reads_annotated_counts(self, api_client, peak_memory, django_assert_max_num_queries):
+        departments = baker.make(models.Department, _quantity=3)
+        for department in departments:
+            baker.make(
+                models.Doctor,
+                department=department,
+                fees=500,
+                _quantity=DOCTORS_PER_DEPARTMENT,
+                _bulk_create=True
+            )
+
+        api_client.get('/store/departments/')
+        # measure the database and serializers, not a cached response
+        cache.clear()
+        # the list and the aggregate behind its ETag
+        with django_assert_max_num_queries(2):
+            response, peak = peak_memory(lambda: api_client.get('/store/departments/'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert f'{DOCTORS_PER_DEPARTMENT} Doctors' in response.content.decode()
+        assert peak < 1024 * 1024
@@ -0,0 +1,106 @@
+import re
+import time
+
+import pytest
+from django.core.cache import cache
+from model_bakery import baker
+from rest_framework import status
+
+from store import catalog_cache, models
+
+
+@pytest.fixture
+def compute():
+    calls = []
+
+    def do_compute():
+        calls.append(True)
+        return f'computed {len(calls)}'
+    do_compute.calls = calls
+    return do_compute
+
+
+class TestGetOrCompute:
+    def test_computes_once_until_stale(self, compute):
+        assert catalog_cache.get_or_compute('key', compute) == 'computed 1'
+        assert catalog_cache.get_or_compute('key', compute) == 'computed 1'
+        assert len(compute.calls) == 1
+
+    def test_serves_stale_data_while_another_request_recomputes(self, compute):
+        cache.set('key', (time.time() - 1, 'stale'))
+        cache.add('key:lock', True)
+
+        assert catalog_cache.get_or_compute('key', compute) == 'stale'
+        assert compute.calls == []
+
+    def test_the_lock_holder_refreshes_stale_data(self, compute):
+        cache.set('key', (time.time() - 1, 'stale'))
+
+        assert catalog_cache.get_or_compute('key', compute) == 'computed 1'
+        assert catalog_cache.get_or_compute('key', compute) == 'computed 1'
+
+    def test_waits_for_the_lock_holder_instead_of_computing(self, compute, settings):
+        settings.CATALOG_CACHE_LOCK_TIMEOUT = 0.2
+        cache.add('key:lock', True)
+
+        # the lock holder never finishes, so the waiter gives up and computes
+        assert catalog_cache.get_or_compute('key', compute) == 'computed 1'
+
+        cache.add('key:lock', True)
+        cache.set('key', (time.time() + 60, 'from the lock holder'))
+        assert catalog_cache.get_or_compute('key', compute) == 'from the lock holder'
+
+
+@pytest.mark.django_db
+class TestCachedCatalog:
+    def test_repeated_requests_do_not_query(self, api_client, django_assert_num_queries):
+        baker.make(models.Test, unit_price=100, _quantity=3)
+        api_client.get('/store/tests/?ordering=unit_price')
+
+        # only the renderer's filter form still lists the collections
+        with django_assert_num_queries(1):
+            response = api_client.get('/store/tests/?ordering=unit_price')
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_a_hit_renders_the_same_page_as_a_miss(self, api_client):
+        baker.make(models.Test, unit_price=100, _quantity=20)
+
+        # the CSRF token is masked differently on every request
+        csrf_token = re.compile(r'(?<=value=")[\w]{64}(?=")|(?<="csrfToken": ")[\w]{64}')
+        miss = csrf_token.sub('', api_client.get('/store/tests/?page=1').content.decode())
+        hit = csrf_token.sub('', api_client.get('/store/tests/?page=1').content.decode())
+
+        assert 'page=2' in miss
+        assert hit == miss
+
+    def test_query_parameters_are_part_of_the_key(self, api_client):
+        baker.make(models.Test, title='Lipid Profile', unit_price=100)
+        baker.make(models.Test, title='Vitamin D', unit_price=500)
+
+        cheap = api_client.get('/store/tests/?unit_price__lt=200').content.decode()
+        expensive = api_client.get('/store/tests/?unit_price__gt=200').content.decode()
+
+        assert 'Lipid Profile' in cheap and 'Vitamin D' not in cheap
+        assert 'Vitamin D' in expensive and 'Lipid Profile' not in expensive
+
+    def test_changes_invalidate_every_scope_showing_the_model(self, api_client, django_capture_on_commit_callbacks):
+        collection = baker.make(models.Collection, title='Biochemistry')
+        test = baker.make(models.Test, collection=collection, unit_price=100)
+        api_client.get('/store/tests/')
+        api_client.get(f'/store/tests/{test.id}/')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            collection.title = 'Clinical Biochemistry'
+            collection.save()
+
+        assert 'Clinical Biochemistry' in api_client.get('/store/tests/').content.decode()
+        assert 'Clinical Biochemistry' in api_client.get(f'/store/tests/{test.id}/').content.decode()
+
+    def test_errors_are_not_cached(self, api_client, django_capture_on_commit_callbacks):
+        assert api_client.get('/store/doctors/1/').status_code == status.HTTP_404_NOT_FOUND
+
+        with django_capture_on_commit_callbacks(execute=True):
+            doctor = baker.make(models.Doctor, id=1)
+
+        assert api_client.get(f'/store/doctors/{doctor.id}/').status_code == status.HTTP_200_OK
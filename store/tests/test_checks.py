@@ -0,0 +1,13 @@
+from store.checks import check_shared_cache
+
+
+class TestSharedCacheCheck:
+    def test_warns_about_a_process_local_cache(self, settings):
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+        assert [warning.id for warning in check_shared_cache(None)] == ['store.W001']
+
+    def test_accepts_redis(self, settings):
+        settings.CACHES = {'default': {'BACKEND': 'django_redis.cache.RedisCache'}}
+
+        assert check_shared_cache(None) == []
@@ -0,0 +1,71 @@
+import pytest
+from model_bakery import baker
+from rest_framework import status
+
+from store import models
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def test_unchanged_lists_are_not_sent_again(self, api_client, django_assert_num_queries):
+        baker.make(models.Test, unit_price=100, _quantity=3)
+        response = api_client.get('/store/tests/')
+
+        with django_assert_num_queries(0):
+            not_modified = api_client.get('/store/tests/', HTTP_IF_NONE_MATCH=response['ETag'])
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not_modified.content == b''
+
+    def test_last_modified_is_honoured_on_details(self, api_client):
+        doctor = baker.make(models.Doctor)
+        response = api_client.get(f'/store/doctors/{doctor.id}/')
+
+        not_modified = api_client.get(f'/store/doctors/{doctor.id}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_a_list_is_sent_again_after_a_delete_despite_if_modified_since(
+            self, api_client, django_capture_on_commit_callbacks):
+        doctors = baker.make(models.Doctor, _quantity=2)
+        response = api_client.get('/store/doctors/')
+        assert 'Last-Modified' not in response
+
+        with django_capture_on_commit_callbacks(execute=True):
+            doctors[1].delete()
+        # a date the remaining rows were all modified before
+        response = api_client.get('/store/doctors/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_changes_and_filters_change_the_etag(self, api_client, django_capture_on_commit_callbacks):
+        test = baker.make(models.Test, unit_price=100)
+        etag = api_client.get('/store/tests/')['ETag']
+
+        assert api_client.get('/store/tests/?unit_price__lt=200')['ETag'] != etag
+
+        with django_capture_on_commit_callbacks(execute=True):
+            test.title = 'Lipid Profile'
+            test.save()
+        response = api_client.get('/store/tests/', HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_detail_views_have_their_own_etag(self, api_client):
+        first, second = baker.make(models.Test, unit_price=100, _quantity=2)
+        etag = api_client.get(f'/store/tests/{first.id}/')['ETag']
+
+        assert api_client.get(f'/store/tests/{first.id}/', HTTP_IF_NONE_MATCH=etag).status_code == \
+            status.HTTP_304_NOT_MODIFIED
+        assert api_client.get(f'/store/tests/{second.id}/', HTTP_IF_NONE_MATCH=etag).status_code == \
+            status.HTTP_200_OK
+
+    def test_staff_pages_have_their_own_etag(self, api_client, authenticate):
+        baker.make(models.Collection)
+        etag = api_client.get('/store/collections/')['ETag']
+
+        authenticate(is_staff=True)
+
+        assert api_client.get('/store/collections/', HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
@@ -0,0 +1,88 @@
+import pytest
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import check_password
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from core.models import User
+
+
+@pytest.fixture
+def patient():
+    user = baker.make(User, username='asha', email='asha@example.com')
+    user.set_password('s3cret-pass')
+    user.save()
+    return user
+
+
+@pytest.fixture
+def hashed(monkeypatch):
+    # every password check, so a refused attempt can be shown to skip the hashing
+    calls = []
+
+    def do_check(self, raw_password):
+        calls.append(self.username)
+        return check_password(raw_password, self.password)
+    monkeypatch.setattr(User, 'check_password', do_check)
+    return calls
+
+
+@pytest.mark.django_db
+class TestLogin:
+    @pytest.mark.parametrize('identifier', ['asha', 'asha@example.com'])
+    def test_signs_in_with_username_or_email_in_one_query(self, client, patient, identifier):
+        with CaptureQueriesContext(connection) as context:
+            user = authenticate(username=identifier, password='s3cret-pass')
+
+        assert user == patient
+        assert len(context) == 1
+
+        response = client.post('/auth/login/', {'username': identifier, 'password': 's3cret-pass'})
+
+        assert response.status_code == 302
+        assert client.session['_auth_user_id'] == str(patient.id)
+
+    def test_unknown_email_shows_the_error_page(self, client):
+        response = client.post('/auth/login/', {'username': 'nobody@example.com', 'password': 'guess'})
+
+        assert response.status_code == 200
+        assert b'User ID or Password is Incorrect.' in response.content
+
+    def test_a_username_that_is_another_users_email_signs_in_its_own_account(self, patient):
+        other = baker.make(User, username='asha@example.com', email='other@example.com')
+        other.set_password('other-pass')
+        other.save()
+
+        assert authenticate(username='asha@example.com', password='other-pass') == other
+
+    def test_refuses_an_account_over_its_failures_without_hashing(self, client, settings, patient, hashed):
+        settings.LOGIN_MAX_FAILURES_PER_ACCOUNT = 3
+        for identifier in ['asha', 'asha@example.com', 'asha']:
+            assert authenticate(username=identifier, password='wrong') is None
+
+        assert authenticate(username='asha', password='s3cret-pass') is None
+        assert hashed == ['asha'] * 3
+
+    def test_success_resets_the_account_failures(self, settings, patient):
+        settings.LOGIN_MAX_FAILURES_PER_ACCOUNT = 2
+        authenticate(username='asha', password='wrong')
+        assert authenticate(username='asha', password='s3cret-pass') == patient
+
+        authenticate(username='asha', password='wrong')
+        assert authenticate(username='asha', password='s3cret-pass') == patient
+
+    def test_refuses_a_stuffing_ip_before_any_query(self, client, settings, patient, hashed):
+        settings.LOGIN_MAX_FAILURES_PER_IP = 4
+        for index in range(4):
+            client.post('/auth/login/', {'username': f'user{index}@example.com', 'password': 'guess'})
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post('/auth/login/', {'username': 'asha', 'password': 's3cret-pass'})
+
+        assert response.status_code == 429
+        assert not [query for query in context.captured_queries if 'core_user' in query['sql']]
+        assert hashed == []
+        # other clients can still sign in
+        assert client.post('/auth/login/', {'username': 'asha', 'password': 's3cret-pass'},
+                           REMOTE_ADDR='10.0.0.2').status_code == 302
@@ -0,0 +1,130 @@
+import smtplib
+import socketserver
+import threading
+import time
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from model_bakery import baker
+
+from store import models, newsletter, tasks
+
+CONTEXT = {'subject': 'Monsoon checkups', 'body': 'Half price on every test.'}
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    # Just enough SMTP to accept messages and count the connections they came over.
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('localhost', 0), SMTPHandler)
+        self.connections = 0
+        self.recipients = []
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 sink')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command == 'EHLO':
+                self.reply('250 sink')
+            elif command == 'RCPT':
+                self.server.recipients.append(line.split(':', 1)[1].strip('<> '))
+                self.reply('250 ok')
+            elif command == 'DATA':
+                self.reply('354 go on')
+                while self.rfile.readline().strip() != b'.':
+                    pass
+                self.reply('250 queued')
+            else:
+                self.reply('250 ok')
+
+
+@pytest.fixture
+def smtp_sink(settings):
+    sink = SMTPSink()
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    settings.EMAIL_HOST, settings.EMAIL_PORT = sink.server_address
+    yield sink
+    newsletter.mailer.close()
+    sink.shutdown()
+    sink.server_close()
+
+
+@pytest.fixture
+def subscribers():
+    def do_subscribers(count):
+        return baker.make(models.Subscribe, email=iter(f'reader{index}@example.com' for index in range(count)),
+                          _quantity=count)
+    return do_subscribers
+
+
+@pytest.mark.django_db
+class TestNewsletter:
+    def test_batches_cover_every_subscriber_once(self, subscribers):
+        ids = [subscriber.id for subscriber in subscribers(7)]
+
+        bounds = list(newsletter.batch_bounds(3))
+
+        assert bounds == [(0, ids[2]), (ids[2], ids[5]), (ids[5], ids[6])]
+
+    def test_renders_the_template_for_every_subscriber(self, subscribers):
+        subscribers(2)
+
+        sent = newsletter.send_batch(CONTEXT, 0, models.Subscribe.objects.last().id)
+
+        assert sent == 2
+        assert [message.to for message in mail.outbox] == [['reader0@example.com'], ['reader1@example.com']]
+        assert mail.outbox[0].subject == 'Monsoon checkups'
+        assert 'Half price' in mail.outbox[0].alternatives[0][0]
+
+    def test_sends_all_batches_over_one_smtp_connection(self, smtp_sink, subscribers, tmp_path, capsys):
+        subscribers(25)
+        body = tmp_path / 'body.txt'
+        body.write_text(CONTEXT['body'])
+
+        call_command('send_newsletter', CONTEXT['subject'], str(body), now=True, batch_size=10)
+
+        assert smtp_sink.connections == 1
+        assert len(smtp_sink.recipients) == 25
+        assert 'Sent 25 messages' in capsys.readouterr().out
+
+    def test_keeps_under_the_rate_limit(self, settings, subscribers):
+        settings.NEWSLETTER_MAX_RATE = 50
+        subscribers(6)
+
+        start = time.perf_counter()
+        newsletter.send_batch(CONTEXT, 0, models.Subscribe.objects.last().id)
+
+        assert time.perf_counter() - start >= 5 / 50
+
+    def test_failed_batch_is_retried_after_the_last_subscriber_served(self, monkeypatch, subscribers):
+        ids = [subscriber.id for subscriber in subscribers(5)]
+        send = newsletter.mailer.send
+
+        def fail_on_the_third(message):
+            if message.to == ['reader2@example.com']:
+                raise smtplib.SMTPServerDisconnected('gone')
+            return send(message)
+        monkeypatch.setattr(newsletter.mailer, 'send', fail_on_the_third)
+        retries = []
+        monkeypatch.setattr(tasks.send_newsletter_batch, 'retry',
+                            lambda **kwargs: retries.append(kwargs['args']) or RuntimeError())
+
+        with pytest.raises(RuntimeError):
+            tasks.send_newsletter_batch(CONTEXT, 0, ids[-1])
+
+        assert retries == [(CONTEXT, ids[1], ids[-1], newsletter.TEMPLATE)]
+        assert len(mail.outbox) == 2
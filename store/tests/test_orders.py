@@ -0,0 +1,136 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework import status
+
+from store import models
+from store.pagination import KeysetPagination
+
+
+@pytest.fixture
+def create_orders():
+    def do_create_orders(user, count):
+        test = baker.make(models.Test, unit_price=100)
+        orders = baker.make(models.Order, user=user, _quantity=count)
+        baker.make(
+            models.OrderedTest,
+            order=iter(orders),
+            test=test,
+            unit_price=test.unit_price,
+            _quantity=count
+        )
+        # every other order already has its report
+        baker.make(
+            models.Report,
+            order=iter(orders[::2]),
+            test=test,
+            user=user,
+            _quantity=len(orders[::2])
+        )
+        return orders
+    return do_create_orders
+
+
+@pytest.mark.django_db
+class TestListOrders:
+    def test_if_user_is_anonymous_returns_302(self, api_client):
+        response = api_client.get('/store/orders/')
+
+        assert response.status_code == status.HTTP_302_FOUND
+
+    def test_query_count_does_not_grow_with_orders(self, api_client, authenticate, create_orders, monkeypatch):
+        user = authenticate()
+        create_orders(user, 60)
+
+        def orders_page(page_size):
+            monkeypatch.setattr(KeysetPagination, 'page_size', page_size)
+            with CaptureQueriesContext(connection) as context:
+                response = api_client.get('/store/orders/')
+            content = response.content.decode()
+            assert content.count('View Report!') + content.count('Pending!') == page_size
+            return len(context)
+
+        # session, user, orders, ordered tests, their tests, their reports
+        # and the test choices of the "place order" form, for 5 rows as for 50
+        assert orders_page(5) == orders_page(50) <= 7
+
+    def test_links_report_only_when_it_exists(self, api_client, authenticate, create_orders):
+        user = authenticate()
+        orders = create_orders(user, 2)
+        report = models.Report.objects.get(order=orders[0])
+
+        response = api_client.get('/store/orders/')
+
+        content = response.content.decode()
+        assert f'/store/reports/{report.id}' in content
+        assert 'Pending!' in content
+
+    def test_multi_test_orders_link_each_report_and_keep_the_rest_pending(self, api_client, authenticate):
+        user = authenticate()
+        lipid, sugar = baker.make(models.Test, title='Lipid Profile'), baker.make(models.Test, title='Blood Sugar')
+        order = baker.make(models.Order, user=user)
+        baker.make(models.OrderedTest, order=order, test=iter([lipid, sugar]), unit_price=100, _quantity=2)
+        report = baker.make(models.Report, order=order, test=lipid, user=user)
+
+        content = api_client.get('/store/orders/').content.decode()
+
+        assert f'/store/reports/{report.id}' in content
+        assert 'Lipid Profile: View Report!' in content
+        assert 'Blood Sugar: Pending!' in content
+
+        second = baker.make(models.Report, order=order, test=sugar, user=user)
+        content = api_client.get('/store/orders/').content.decode()
+
+        assert f'/store/reports/{second.id}' in content
+        assert 'Pending!' not in content
+
+
+@pytest.mark.django_db
+class TestCheckout:
+    def test_places_one_order_with_every_test(self, api_client, authenticate, django_assert_max_num_queries):
+        user = authenticate()
+        tests = baker.make(models.Test, unit_price=100, _quantity=5)
+        items = [{'test': test.id, 'quantity': 2} for test in tests]
+        items.append({'test': tests[0].id})
+
+        # session, user, tests, order with its savepoints, ordered tests, the
+        # total and the order, its tests and its reports read back
+        with django_assert_max_num_queries(13):
+            response = api_client.post('/store/orders/checkout/', {'items': items}, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        order = models.Order.objects.get(user=user)
+        assert order.tests.count() == 5
+        assert order.tests.get(test=tests[0]).quantity == 3
+        assert order.total_amount == 1100
+        assert response.data['total_payable'] == order.total_amount
+
+    def test_if_a_test_does_not_exist_returns_400_and_places_nothing(self, api_client, authenticate):
+        authenticate()
+        test = baker.make(models.Test, unit_price=100)
+
+        response = api_client.post(
+            '/store/orders/checkout/',
+            {'items': [{'test': test.id}, {'test': test.id + 1}]},
+            format='json'
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not models.Order.objects.exists()
+
+    def test_if_cart_is_empty_returns_400(self, api_client, authenticate):
+        authenticate()
+
+        response = api_client.post('/store/orders/checkout/', {'items': []}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_placing_one_test_stores_its_total(self, api_client, authenticate):
+        user = authenticate()
+        test = baker.make(models.Test, unit_price=250)
+
+        response = api_client.post('/store/orders/', {'test': test.id})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert models.Order.objects.get(user=user).total_amount == 250
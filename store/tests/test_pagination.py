@@ -0,0 +1,105 @@
+import datetime
+import json
+from base64 import urlsafe_b64encode
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from store import models
+from store.pagination import KeysetPagination
+
+
+@pytest.fixture
+def paginate():
+    def do_paginate(queryset, cursor=None):
+        url = '/store/reviews/' if cursor is None else f'/store/reviews/?cursor={cursor}'
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, Request(APIRequestFactory().get(url)))
+        return page, paginator
+    return do_paginate
+
+
+def cursor_of(link):
+    return parse_qs(urlparse(link).query)['cursor'][0]
+
+
+@pytest.fixture
+def reviews():
+    # many rows share a date, so the id has to break the ties
+    reviews = baker.make(models.Review, _quantity=40)
+    for index, review in enumerate(reviews):
+        review.date = datetime.date(2022, 1, 1) + datetime.timedelta(days=index // 7)
+    models.Review.objects.bulk_update(reviews, ['date'])
+    return models.Review.objects.order_by('-date', '-id')
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def test_pages_through_every_row_once(self, paginate, reviews):
+        seen = []
+        page, paginator = paginate(reviews)
+        while True:
+            seen += page
+            if paginator.get_next_link() is None:
+                break
+            page, paginator = paginate(reviews, cursor_of(paginator.get_next_link()))
+
+        assert seen == list(reviews)
+
+    def test_previous_link_returns_the_previous_page(self, paginate, reviews):
+        first_page, paginator = paginate(reviews)
+        second_page, paginator = paginate(reviews, cursor_of(paginator.get_next_link()))
+        page, paginator = paginate(reviews, cursor_of(paginator.get_previous_link()))
+
+        assert page == first_page
+        assert paginator.get_previous_link() is None
+        assert paginator.get_next_link() is not None
+
+    def test_follows_the_requested_direction(self, paginate, reviews):
+        page, _ = paginate(reviews.order_by('date'))
+
+        assert page == list(models.Review.objects.order_by('date', 'id')[:KeysetPagination.page_size])
+
+    def test_deep_pages_run_one_query_without_count(self, paginate, reviews):
+        _, paginator = paginate(reviews)
+        _, paginator = paginate(reviews, cursor_of(paginator.get_next_link()))
+
+        with CaptureQueriesContext(connection) as context:
+            paginate(reviews, cursor_of(paginator.get_next_link()))
+
+        assert len(context) == 1
+        assert 'COUNT' not in context.captured_queries[0]['sql']
+        assert 'OFFSET' not in context.captured_queries[0]['sql']
+
+    def test_invalid_cursor_is_not_found(self, paginate, reviews):
+        with pytest.raises(NotFound):
+            paginate(reviews, 'not-a-cursor')
+
+    @pytest.mark.parametrize('cursor', [['not-a-date', 1, False], ['2022-01-01', 'one', False], [None, 1, False]])
+    def test_cursor_with_a_wrongly_typed_value_is_not_found(self, paginate, reviews, cursor):
+        with pytest.raises(NotFound):
+            paginate(reviews, urlsafe_b64encode(json.dumps(cursor).encode()).decode())
+
+
+@pytest.mark.django_db
+class TestPaginatedViews:
+    @pytest.mark.parametrize('url', ['/store/orders/', '/store/checkups/', '/store/reports/', '/store/reviews/'])
+    def test_lists_are_bounded(self, api_client, authenticate, url):
+        user = authenticate()
+        orders = baker.make(models.Order, user=user, _quantity=20)
+        baker.make(models.OrderedTest, order=iter(orders), unit_price=100, _quantity=20)
+        baker.make(models.Report, order=iter(orders), user=user, _quantity=20)
+        baker.make(models.Checkup, user=user, _quantity=20)
+        baker.make(models.Review, user=user, _quantity=20)
+
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'cursor=' in response.content.decode()
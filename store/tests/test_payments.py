@@ -0,0 +1,137 @@
+import datetime
+import threading
+
+import pytest
+from django.db import connection, OperationalError
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework import status
+
+from core.models import User
+from store import models, payments
+
+
+@pytest.fixture
+def order():
+    def do_order(user, total_amount=300):
+        return baker.make(models.Order, user=user, total_amount=total_amount)
+    return do_order
+
+
+@pytest.fixture
+def checkup():
+    def do_checkup(user, fees=(500, 300)):
+        checkup = baker.make(models.Checkup, user=user)
+        for fee in fees:
+            baker.make(models.DoctorForCheckup, checkup=checkup, doctor_fees=fee)
+        return checkup
+    return do_checkup
+
+
+@pytest.mark.django_db
+class TestOrderPayment:
+    def test_completes_a_pending_order_once(self, api_client, authenticate, order):
+        paid = order(authenticate())
+
+        first = api_client.get(f'/store/orders/{paid.id}/payment/')
+        again = api_client.get(f'/store/orders/{paid.id}/payment/')
+
+        assert first.status_code == again.status_code == status.HTTP_200_OK
+        assert '300' in first.content.decode()
+        paid.refresh_from_db()
+        assert paid.payment_status == models.Order.PAYMENT_STATUS_COMPLETE
+
+    def test_if_order_is_someone_elses_returns_404(self, api_client, authenticate, order):
+        authenticate()
+        others = order(baker.make(User))
+
+        response = api_client.get(f'/store/orders/{others.id}/payment/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        others.refresh_from_db()
+        assert others.payment_status == models.Order.PAYMENT_STATUS_PENDING
+
+    def test_retry_with_the_same_key_replays_the_stored_response(self, api_client, authenticate, order):
+        paid = order(authenticate())
+        first = api_client.get(f'/store/orders/{paid.id}/payment/', HTTP_IDEMPOTENCY_KEY='pay-1')
+        models.Order.objects.filter(pk=paid.pk).update(total_amount=999)
+
+        retry = api_client.get(f'/store/orders/{paid.id}/payment/', HTTP_IDEMPOTENCY_KEY='pay-1')
+
+        assert retry.status_code == status.HTTP_200_OK
+        assert retry['Idempotent-Replayed'] == 'true'
+        assert retry.content == first.content
+
+    def test_if_key_was_used_for_another_order_returns_422(self, api_client, authenticate, order):
+        user = authenticate()
+        first, second = order(user), order(user)
+        api_client.get(f'/store/orders/{first.id}/payment/', HTTP_IDEMPOTENCY_KEY='pay-1')
+
+        response = api_client.get(f'/store/orders/{second.id}/payment/', HTTP_IDEMPOTENCY_KEY='pay-1')
+
+        assert response.status_code == 422
+        second.refresh_from_db()
+        assert second.payment_status == models.Order.PAYMENT_STATUS_PENDING
+
+    def test_keys_past_their_ttl_are_purged(self, settings):
+        settings.IDEMPOTENCY_KEY_TTL = 60 * 60
+        kept, expired = baker.make(models.IdempotencyKey, _quantity=2)
+        models.IdempotencyKey.objects.filter(pk=expired.pk).update(
+            created_at=timezone.now() - datetime.timedelta(hours=2)
+        )
+
+        assert payments.purge_idempotency_keys() == 1
+        assert list(models.IdempotencyKey.objects.all()) == [kept]
+
+
+@pytest.mark.django_db
+class TestCheckupPayment:
+    def test_total_is_the_sum_of_the_doctors_fees(self, api_client, authenticate, checkup,
+                                                   django_assert_max_num_queries):
+        paid = checkup(authenticate())
+
+        # session, user, checkup and its update within a savepoint
+        with django_assert_max_num_queries(6):
+            response = api_client.get(f'/store/checkups/{paid.id}/payment/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert '800' in response.content.decode()
+        paid.refresh_from_db()
+        assert paid.payment_status == models.Checkup.PAYMENT_STATUS_COMPLETE
+
+    def test_if_checkup_is_someone_elses_returns_404(self, api_client, authenticate, checkup):
+        authenticate()
+        others = checkup(baker.make(User))
+
+        response = api_client.get(f'/store/checkups/{others.id}/payment/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentPayment:
+    def test_only_one_of_many_concurrent_payments_completes_the_order(self, order):
+        paid = order(baker.make(User))
+        results = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            try:
+                barrier.wait()
+                while True:
+                    try:
+                        results.append(payments.complete(models.Order.objects.filter(pk=paid.pk)))
+                        break
+                    except OperationalError:
+                        # SQLite fails writers that wait too long for its lock
+                        pass
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(results) == [False] * 7 + [True]
@@ -0,0 +1,141 @@
+import datetime
+
+import pytest
+from model_bakery import baker
+from rest_framework import status
+
+from store import models
+
+# Generous enough for a loaded CI machine, far below what an N+1 over the
+# seeded rows costs.
+MAX_SECONDS = 1.5
+
+
+@pytest.fixture
+def seed(authenticate):
+    def do_seed(is_staff=False):
+        user = authenticate(is_staff=is_staff)
+
+        collections = baker.make(models.Collection, _quantity=5)
+        tests = baker.make(
+            models.Test,
+            collection=iter(collections * 40),
+            unit_price=100,
+            _quantity=200,
+            _bulk_create=True
+        )
+        departments = baker.make(models.Department, _quantity=5)
+        qualifications = baker.make(models.Qualification, _quantity=5)
+        doctors = baker.make(
+            models.Doctor,
+            department=iter(departments * 10),
+            qualification=iter(qualifications * 10),
+            fees=500,
+            _quantity=50,
+            _bulk_create=True
+        )
+        days = baker.make(models.Day, _quantity=7)
+        baker.make(
+            models.Timing,
+            doctor=iter(doctors * 3),
+            day=iter(days * 22),
+            _quantity=150,
+            _bulk_create=True
+        )
+
+        orders = baker.make(models.Order, user=user, _quantity=100)
+        baker.make(
+            models.OrderedTest,
+            order=iter(orders),
+            test=iter(tests),
+            unit_price=100,
+            _quantity=100,
+            _bulk_create=True
+        )
+        reports = baker.make(
+            models.Report,
+            order=iter(orders[:50]),
+            test=iter(tests),
+            user=user,
+            _quantity=50,
+            _bulk_create=True
+        )
+        checkups = baker.make(models.Checkup, user=user, _quantity=50)
+        baker.make(
+            models.DoctorForCheckup,
+            checkup=iter(checkups * 2),
+            doctor=iter(doctors * 2),
+            doctor_fees=500,
+            _quantity=100,
+            _bulk_create=True
+        )
+        queries = baker.make(models.Query, phone='9999999999', _quantity=100, _bulk_create=True)
+        baker.make(models.Review, test=iter(tests), user=user, _quantity=200, _bulk_create=True)
+
+        return {
+            'user': user,
+            'collection': collections[0],
+            'department': departments[0],
+            'test': tests[0],
+            'doctor': doctors[0],
+            'day': days[0],
+            'order': orders[0],
+            'checkup': checkups[0],
+            'query': models.Query.objects.first(),
+            'review': models.Review.objects.first(),
+            'report': reports[0],
+        }
+    return do_seed
+
+
+# Every budget counts the session and user lookups, and one query per choice
+# list of the forms the AdminRenderer draws under a list.
+ROUTES = [
+    # (url, staff only, max queries); the catalog routes include the aggregate behind their ETag
+    ('/store/collections/', False, 4),
+    ('/store/collections/{collection.id}/', False, 4),
+    ('/store/departments/', False, 4),
+    ('/store/departments/{department.id}/', False, 4),
+    ('/store/tests/', False, 6),
+    ('/store/tests/?search=a&ordering=unit_price', False, 6),
+    ('/store/tests/{test.id}/', False, 5),
+    ('/store/doctors/', False, 6),
+    ('/store/doctors/?department={department.id}', False, 8),
+    ('/store/doctors/{doctor.id}/', False, 5),
+    ('/store/doctors/{doctor.id}/schedule/', False, 4),
+    ('/store/doctors/available/?day={day.name}&time=12:00&department={department.id}', False, 8),
+    ('/store/orders/', False, 7),
+    ('/store/orders/?payment_status=P', False, 7),
+    ('/store/orders/{order.id}/', False, 6),
+    ('/store/orders/{order.id}/payment/', False, 6),
+    ('/store/checkups/', False, 7),
+    ('/store/checkups/{checkup.id}/', False, 5),
+    ('/store/checkups/{checkup.id}/payment/', False, 6),
+    ('/store/querys/', False, 3),
+    ('/store/querys/{query.id}/', False, 3),
+    ('/store/reviews/', False, 5),
+    ('/store/reviews/?test={test.id}', False, 7),
+    ('/store/reviews/{review.id}/', False, 5),
+    ('/store/reports/', False, 4),
+    ('/store/reports/{report.id}/', False, 4),
+    ('/store/reports/{report.id}/download/', False, 4),
+    ('/store/reports/export/?start={today}&end={today}', True, 4),
+    ('/store/reports/render_stats/', True, 4),
+    ('/auth/profile/', False, 3),
+    ('/auth/profile/{user.id}/', False, 3),
+]
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+    @pytest.mark.parametrize('url, is_staff, max_queries', ROUTES)
+    def test_route_stays_within_budget(self, api_client, seed, assert_budget, url, is_staff, max_queries):
+        objects = seed(is_staff=is_staff)
+        url = url.format(today=datetime.date.today(), **objects)
+
+        with assert_budget(max_queries, MAX_SECONDS):
+            response = api_client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+
+        assert response.status_code == status.HTTP_200_OK
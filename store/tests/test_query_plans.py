@@ -0,0 +1,88 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework import status
+
+from core.models import User
+from store import models
+
+
+@pytest.fixture
+def seed(authenticate):
+    user = authenticate()
+    other = baker.make(User)
+    tests = baker.make(models.Test, unit_price=100, _quantity=20, _bulk_create=True)
+    doctor = baker.make(models.Doctor, fees=500)
+    baker.make(models.Timing, doctor=doctor, day=baker.make(models.Day, name='Monday'))
+
+    for owner in (user, other):
+        orders = baker.make(models.Order, user=owner, _quantity=40, _bulk_create=True)
+        baker.make(models.Report, order=iter(orders), test=iter(tests * 2), user=owner, _quantity=40,
+                   _bulk_create=True)
+        baker.make(models.Checkup, user=owner, _quantity=40, _bulk_create=True)
+        baker.make(models.Review, test=iter(tests * 2), user=owner, _quantity=40, _bulk_create=True)
+    baker.make(models.Query, phone='9999999999', _quantity=40, _bulk_create=True)
+
+    # the planner picks indexes from the statistics, as it would in production
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return {'test': tests[0], 'doctor': doctor}
+
+
+def explain(sql):
+    # (the steps of the plan, those that read a whole table or sort the rows)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            steps = [row[-1] for row in cursor.fetchall()]
+            return steps, [
+                step for step in steps
+                if re.match(r'SCAN \w+$', step) or 'TEMP B-TREE' in step
+            ]
+        if connection.vendor == 'mysql':
+            cursor.execute('EXPLAIN ' + sql)
+            columns = [column[0] for column in cursor.description]
+            steps = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return [str(step) for step in steps], [
+                str(step) for step in steps
+                if step['type'] == 'ALL' or 'filesort' in (step['Extra'] or '')
+            ]
+    pytest.skip(f'No query plan check for {connection.vendor}')
+
+
+# (method, url, table whose queries are checked, index one of them must use)
+ACCESS_PATHS = [
+    ('get', '/store/orders/', 'store_order', 'store_order_user_keyset'),
+    ('get', '/store/orders/?payment_status=P', 'store_order', 'store_order_status_keyset'),
+    ('get', '/store/checkups/', 'store_checkup', 'store_checkup_user_keyset'),
+    ('post', '/store/checkups/', 'store_checkup', 'store_checkup_user_keyset'),
+    ('get', '/store/reviews/', 'store_review', 'store_review_keyset'),
+    ('get', '/store/reviews/?test={test.id}', 'store_review', 'store_review_test_keyset'),
+    ('get', '/store/querys/', 'store_query', 'store_query_keyset'),
+    ('get', '/store/reports/', 'store_report', 'store_report_user_keyset'),
+    ('get', '/store/reports/?test={test.id}', 'store_report', 'store_report_test_keyset'),
+]
+
+
+@pytest.mark.django_db
+class TestQueryPlans:
+    @pytest.mark.parametrize('method, url, table, index', ACCESS_PATHS)
+    def test_access_path_uses_an_index_in_order(self, api_client, seed, method, url, table, index):
+        url = url.format(**seed)
+        with CaptureQueriesContext(connection) as context:
+            if method == 'post':
+                response = api_client.post(url, {'doctor': seed['doctor'].id})
+            else:
+                response = api_client.get(url)
+        assert response.status_code in (status.HTTP_200_OK, status.HTTP_201_CREATED)
+
+        selects = [
+            query['sql'] for query in context.captured_queries
+            if re.match(r'SELECT .* FROM [`"]{}[`"]'.format(table), query['sql'])
+        ]
+        plans = {sql: explain(sql) for sql in selects}
+        assert any(index in step for steps, _ in plans.values() for step in steps)
+        assert {sql: problems for sql, (_, problems) in plans.items() if problems} == {}
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from django.core.files.storage import default_storage
+from model_bakery import baker
+
+from store import report_cache
+from store.models import Report
+
+PDF = b'%PDF-1.4 ' + b'x' * 91
+
+
+def cached(report_id, detail='Glucose 90 mg/dL', last_used=None):
+    report = Report(id=report_id, detail=detail)
+    name = report_cache.put(report, PDF)
+    if last_used is not None:
+        os.utime(default_storage.path(name), (last_used, last_used))
+    return report
+
+
+class TestReportCache:
+    def test_counts_hits_and_misses(self):
+        report = Report(id=1, detail='Glucose 90 mg/dL')
+
+        assert report_cache.get(report) is None
+        cached(1)
+        assert report_cache.get(report) == default_storage.path(report_cache.cache_name(report))
+
+        assert report_cache.stats() == {
+            'hits': 1, 'misses': 1, 'evictions': 0, 'invalidations': 0, 'bytes': len(PDF)
+        }
+
+    def test_overwriting_a_pdf_counts_its_bytes_once(self):
+        cached(1)
+        cached(1)
+
+        assert report_cache.stats()['bytes'] == len(PDF)
+
+    def test_evicts_the_least_recently_used_pdfs_past_the_cap(self, settings):
+        settings.REPORT_CACHE_MAX_BYTES = 3 * len(PDF)
+        oldest, older, recent = cached(1, last_used=1000), cached(2, last_used=2000), cached(3, last_used=3000)
+        # reading the oldest one makes it the most recently used
+        report_cache.get(oldest)
+
+        cached(4)
+
+        assert report_cache.get(older) is None
+        assert report_cache.get(recent) is None
+        assert report_cache.get(oldest) is not None
+        assert report_cache.stats()['evictions'] == 2
+        # evicted down to 90% of the cap
+        assert report_cache.stats()['bytes'] == 2 * len(PDF)
+
+    @pytest.mark.django_db
+    def test_changing_the_detail_invalidates_the_pdf(self):
+        report = baker.make(Report, detail='Glucose 90 mg/dL')
+        name = report_cache.put(report, PDF)
+        Report.objects.filter(pk=report.pk).update(pdf=name)
+        report.refresh_from_db()
+
+        report.save()
+        assert default_storage.exists(name)
+
+        report.detail = 'Glucose 95 mg/dL'
+        report.save()
+
+        report.refresh_from_db()
+        assert report.pdf.name == ''
+        assert not default_storage.exists(name)
+        assert report_cache.stats()['invalidations'] == 1
+        assert report_cache.stats()['bytes'] == 0
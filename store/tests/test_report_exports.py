@@ -0,0 +1,41 @@
+import datetime
+import io
+import os
+import zipfile
+
+import pytest
+from django.core.files.storage import default_storage
+from model_bakery import baker
+
+from store import report_cache
+from store.models import Report, Test
+
+CACHED_PDF = b'%PDF-1.4 cached'
+
+
+@pytest.mark.django_db
+class TestReportExport:
+    def test_zips_the_reports_of_the_filtered_test(self, api_client, authenticate):
+        authenticate(is_staff=True)
+        lipid, sugar = baker.make(Test, title='Lipid Profile'), baker.make(Test, title='Blood Sugar')
+        patient = baker.make('core.User', username='asha')
+        cached, rendered = baker.make(Report, test=lipid, user=patient, detail=iter(['LDL 90', 'LDL 95']), _quantity=2)
+        baker.make(Report, test=sugar, user=patient)
+        path = default_storage.path(report_cache.put(cached, CACHED_PDF))
+        os.utime(path, (1000, 1000))
+
+        response = api_client.get('/store/reports/export/', {
+            'start': datetime.date.today(), 'end': datetime.date.today(), 'test': lipid.id
+        })
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+        assert archive.namelist() == [
+            f'{cached.id}_asha_{cached.order_id}_Lipid Profile.pdf',
+            f'{rendered.id}_asha_{rendered.order_id}_Lipid Profile.pdf',
+        ]
+        assert archive.read(archive.namelist()[0]) == CACHED_PDF
+        assert archive.read(archive.namelist()[1]).startswith(b'%PDF')
+        # an export neither fills the cache nor refreshes what it reads
+        assert report_cache.get(rendered) is None
+        assert os.stat(path).st_mtime == 1000
+        assert report_cache.stats()['hits'] == 0
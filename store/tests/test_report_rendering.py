@@ -0,0 +1,92 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
+from model_bakery import baker
+
+from store import report_cache, tasks
+from store.models import Report
+from store.signals.handlers import RENDER_SCHEDULED_KEY
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    # the report ids of every batch handed to the broker; run=True renders them too
+    batches = []
+
+    def do_queued(run=False):
+        def fake_group(signatures):
+            def apply_async(**kwargs):
+                for signature in signatures:
+                    batches.append(signature.args[0])
+                    if run:
+                        signature()
+            return SimpleNamespace(apply_async=apply_async)
+        monkeypatch.setattr(tasks, 'group', fake_group)
+        return batches
+    return do_queued
+
+
+@pytest.mark.django_db
+class TestReportRendering:
+    def test_a_saved_report_is_rendered_into_the_pdf_cache(self, monkeypatch, queued,
+                                                           django_capture_on_commit_callbacks):
+        queued(run=True)
+        monkeypatch.setattr(tasks.render_pending_reports, 'apply_async',
+                            lambda **kwargs: tasks.render_pending_reports())
+
+        with django_capture_on_commit_callbacks(execute=True):
+            report = baker.make(Report, detail='Haemoglobin 13.5 g/dL')
+
+        report.refresh_from_db()
+        assert report.pdf.name == report_cache.cache_name(report)
+        with open(default_storage.path(report.pdf.name), 'rb') as file:
+            assert file.read().startswith(b'%PDF')
+
+    def test_a_rolled_back_report_leaves_the_window_unscheduled(self, monkeypatch,
+                                                                 django_capture_on_commit_callbacks):
+        scheduled = []
+        monkeypatch.setattr(tasks.render_pending_reports, 'apply_async', lambda **kwargs: scheduled.append(kwargs))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with pytest.raises(RuntimeError), transaction.atomic():
+                baker.make(Report)
+                raise RuntimeError
+        assert cache.get(RENDER_SCHEDULED_KEY) is None
+
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(Report)
+            baker.make(Report)
+        assert len(scheduled) == 1
+
+    def test_reports_already_queued_are_not_queued_again(self, settings, queued):
+        settings.REPORT_RENDER_BATCH_SIZE = 2
+        reports = baker.make(Report, _quantity=3)
+        batches = queued()
+
+        assert tasks.render_pending_reports() == 2
+        assert tasks.render_pending_reports() == 0
+        assert batches == [[reports[0].id, reports[1].id], [reports[2].id]]
+
+        # a render that never finished is queued again after the timeout
+        settings.REPORT_RENDER_TIMEOUT = 0
+        assert tasks.render_pending_reports() == 2
+
+    def test_changing_the_detail_queues_the_report_again(self, queued):
+        batches = queued(run=True)
+        report = baker.make(Report, detail='Glucose 90 mg/dL')
+        tasks.render_pending_reports()
+        report.refresh_from_db()
+        old_path = default_storage.path(report.pdf.name)
+
+        report.detail = 'Glucose 95 mg/dL'
+        report.save()
+        tasks.render_pending_reports()
+
+        report.refresh_from_db()
+        assert batches == [[report.id], [report.id]]
+        assert report.pdf.name == report_cache.cache_name(report)
+        assert not os.path.exists(old_path)
@@ -0,0 +1,77 @@
+import datetime
+
+import pytest
+from model_bakery import baker
+from rest_framework import status
+
+from store import models
+
+
+@pytest.fixture
+def doctor():
+    doctor = baker.make(models.Doctor, first_name='Asha', last_name='Sharma')
+    baker.make(
+        models.Timing,
+        doctor=doctor,
+        day=baker.make(models.Day, name='Monday'),
+        start=datetime.time(9, 0),
+        end=datetime.time(13, 30)
+    )
+    return doctor
+
+
+@pytest.mark.django_db
+class TestSchedule:
+    def test_cached_schedule_is_served_without_queries(self, api_client, doctor, django_assert_num_queries):
+        api_client.get(f'/store/doctors/{doctor.id}/schedule/')
+
+        with django_assert_num_queries(0):
+            response = api_client.get(f'/store/doctors/{doctor.id}/schedule/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'Time Schedule for Dr. Asha Sharma' in response.content.decode()
+        assert 'Monday' in response.content.decode()
+
+    def test_json_variant(self, api_client, doctor):
+        response = api_client.get(f'/store/doctors/{doctor.id}/schedule/?format=json')
+
+        assert response.json() == {
+            'id': doctor.id,
+            'name': 'Asha Sharma',
+            'schedule': [{'day': 'Monday', 'start': '09:00 AM', 'end': '01:30 PM'}],
+        }
+
+    def test_timing_changes_regenerate_the_schedule(self, api_client, doctor, django_capture_on_commit_callbacks):
+        api_client.get(f'/store/doctors/{doctor.id}/schedule/')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(
+                models.Timing,
+                doctor=doctor,
+                day=baker.make(models.Day, name='Friday'),
+                start=datetime.time(17, 0),
+                end=datetime.time(20, 0)
+            )
+
+        schedule = api_client.get(f'/store/doctors/{doctor.id}/schedule/?format=json').json()['schedule']
+        assert [item['day'] for item in schedule] == ['Monday', 'Friday']
+
+    def test_a_timing_moved_to_another_doctor_leaves_the_old_schedule(self, api_client, doctor,
+                                                                     django_capture_on_commit_callbacks):
+        other = baker.make(models.Doctor)
+        api_client.get(f'/store/doctors/{doctor.id}/schedule/')
+        api_client.get(f'/store/doctors/{other.id}/schedule/')
+
+        timing = doctor.timings.get()
+        timing.doctor = other
+        with django_capture_on_commit_callbacks(execute=True):
+            timing.save()
+
+        assert api_client.get(f'/store/doctors/{doctor.id}/schedule/?format=json').json()['schedule'] == []
+        schedule = api_client.get(f'/store/doctors/{other.id}/schedule/?format=json').json()['schedule']
+        assert [item['day'] for item in schedule] == ['Monday']
+
+    def test_unknown_doctor_is_not_found(self, api_client):
+        response = api_client.get('/store/doctors/1/schedule/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
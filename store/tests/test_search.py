@@ -0,0 +1,80 @@
+import pytest
+from django.core.cache import cache
+from model_bakery import baker
+from rest_framework import status
+
+from store import models
+from store.search import InMemorySearchBackend, InvertedIndex, MySQLFullTextSearchBackend, boolean_query, tokenize
+
+
+class TestTokenize:
+    def test_stems_plurals_and_pathology_terms(self):
+        assert tokenize('Haemoglobin and Lipids') == ['hemoglobin', 'lipid']
+        assert tokenize('Antibodies screening') == ['antibody', 'screen']
+        assert tokenize('Blood sugar test') == ['blood', 'glucose']
+
+
+class TestBooleanQuery:
+    def test_searches_each_word_as_typed_or_as_its_stem(self):
+        assert boolean_query('Haemoglobin') == ('(haemoglobin* hemoglobin*)', [])
+        assert boolean_query('cholesterol') == ('(cholesterol* lipid*)', [])
+        assert boolean_query('antibodies') == ('(antibodies* antibody*)', [])
+        assert boolean_query('blood sugar test') == ('blood* (sugar* glucose*)', [])
+
+    def test_words_too_short_for_the_fulltext_index_are_returned_apart(self):
+        assert boolean_query('hb t4 of') == ('hemoglobin*', ['hb', 't4'])
+
+    def test_short_words_are_matched_with_like(self):
+        sql = str(MySQLFullTextSearchBackend().search(models.Test.objects.all(), 't4 thyroid').query)
+
+        assert "AGAINST (thyroid* IN BOOLEAN MODE)" in sql
+        assert 'LIKE %t4%' in sql
+
+
+class TestInvertedIndex:
+    def test_ranks_title_matches_first(self):
+        index = InvertedIndex()
+        index.add(1, 'Lipid Profile', 'Cholesterol and triglycerides.')
+        index.add(2, 'Liver Function', 'Includes a lipid check.')
+        index.add(3, 'Urine Routine', '')
+
+        assert index.search('lipids') == [1, 2]
+
+    def test_multi_word_queries_rank_documents_matching_more_words(self):
+        index = InvertedIndex()
+        index.add(1, 'Thyroid Profile', '')
+        index.add(2, 'Thyroid Antibodies', '')
+        index.add(3, 'Lipid Profile', '')
+
+        assert index.search('thyroid profile')[0] == 1
+
+    def test_removed_documents_are_not_found(self):
+        index = InvertedIndex()
+        index.add(1, 'Vitamin D', '')
+        index.remove(1)
+
+        assert index.search('vitamin') == []
+
+
+@pytest.mark.django_db
+class TestSearchTests:
+    def test_finds_tests_saved_after_the_index_was_built(self, api_client, django_capture_on_commit_callbacks):
+        baker.make(models.Test, title='Complete Blood Count', unit_price=100)
+        api_client.get('/store/tests/?search=blood')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(models.Test, title='Glycated Haemoglobin', code='HBA1C', unit_price=100)
+        response = api_client.get('/store/tests/?search=hba1c')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'Glycated Haemoglobin' in response.content.decode()
+        assert 'Complete Blood Count' not in response.content.decode()
+
+    def test_the_index_version_changes_only_after_the_commit(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            baker.make(models.Test, title='Lipid Profile', unit_price=100)
+            assert cache.get(InMemorySearchBackend.VERSION_KEY) is None
+
+        for callback in callbacks:
+            callback()
+        assert cache.get(InMemorySearchBackend.VERSION_KEY) is not None
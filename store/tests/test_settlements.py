@@ -0,0 +1,104 @@
+import csv
+import os
+import time
+
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+
+from core.models import User
+from store import models, settlements
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+@pytest.fixture
+def payments():
+    # the rows settlement.csv and settlement.jsonl refer to
+    user = baker.make(User)
+    for pk, status in [(101, 'P'), (102, 'P'), (103, 'C'), (104, 'F')]:
+        baker.make(models.Order, id=pk, user=user, payment_status=status, total_amount=300)
+    for pk, status in [(201, 'P'), (202, 'C')]:
+        checkup = baker.make(models.Checkup, id=pk, user=user, payment_status=status)
+        baker.make(models.DoctorForCheckup, checkup=checkup, doctor_fees=500)
+        baker.make(models.DoctorForCheckup, checkup=checkup, doctor_fees=300)
+
+
+def read_report(path):
+    with open(path, newline='') as file:
+        return [(row['line'], row['id'], row['reason']) for row in csv.DictReader(file)]
+
+
+@pytest.mark.django_db
+class TestReconcile:
+    def test_applies_settled_and_failed_lines_and_reports_the_rest(self, payments, tmp_path):
+        report_path = str(tmp_path / 'mismatches.csv')
+
+        summary = settlements.reconcile_file(os.path.join(FIXTURES, 'settlement.csv'), report_path, chunk_size=4)
+
+        assert summary == {'lines': 10, 'updated': 3, 'unchanged': 1, 'mismatched': 6}
+        statuses = dict(models.Order.objects.values_list('id', 'payment_status'))
+        assert statuses == {101: 'C', 102: 'F', 103: 'C', 104: 'F'}
+        assert dict(models.Checkup.objects.values_list('id', 'payment_status')) == {201: 'C', 202: 'C'}
+        assert read_report(report_path) == [
+            ('5', '104', 'amount 250.00 differs from 300.00'),
+            ('6', '999', 'no such order'),
+            ('8', '202', 'already complete'),
+            ('9', '101', 'unknown kind'),
+            ('10', '101', 'unknown status'),
+            ('11', 'abc', 'invalid id or amount'),
+        ]
+
+    def test_reads_json_lines(self, payments, tmp_path):
+        report_path = str(tmp_path / 'mismatches.csv')
+
+        summary = settlements.reconcile_file(os.path.join(FIXTURES, 'settlement.jsonl'), report_path)
+
+        assert summary == {'lines': 4, 'updated': 2, 'mismatched': 2}
+        assert [reason for _, _, reason in read_report(report_path)] == [
+            'unreadable line',
+            'amount 500 differs from 800.00',
+        ]
+
+    def test_command_writes_the_report_next_to_the_file(self, payments, tmp_path, capsys):
+        path = tmp_path / 'settlement.csv'
+        path.write_text(open(os.path.join(FIXTURES, 'settlement.csv')).read())
+
+        call_command('reconcile_settlements', str(path))
+
+        assert 'Reconciled 10 lines: 3 updated' in capsys.readouterr().out
+        assert len(read_report(str(path) + '.mismatches.csv')) == 6
+
+    def test_queries_do_not_grow_with_the_lines_of_a_chunk(self, tmp_path, django_assert_max_num_queries):
+        orders = baker.make(models.Order, total_amount=100, _quantity=500)
+        path = tmp_path / 'settlement.csv'
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['kind', 'id', 'status', 'amount'])
+            for order in orders:
+                writer.writerow(['order', order.id, 'settled', '100'])
+
+        # one read and one UPDATE within a savepoint
+        with django_assert_max_num_queries(4):
+            summary = settlements.reconcile_file(str(path), str(tmp_path / 'mismatches.csv'), chunk_size=1000)
+
+        assert summary['updated'] == 500
+
+
+@pytest.mark.django_db
+def test_reconciles_a_large_file_quickly(tmp_path):
+    user = baker.make(User)
+    models.Order.objects.bulk_create(models.Order(user=user, total_amount=100) for _ in range(20000))
+    path = tmp_path / 'settlement.csv'
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['kind', 'id', 'status', 'amount'])
+        for index, pk in enumerate(models.Order.objects.values_list('id', flat=True)):
+            writer.writerow(['order', pk, 'failed' if index % 10 == 0 else 'settled', '100'])
+
+    start = time.perf_counter()
+    summary = settlements.reconcile_file(str(path), str(tmp_path / 'mismatches.csv'))
+    elapsed = time.perf_counter() - start
+
+    assert summary['updated'] == 20000
+    assert elapsed < 5
@@ -0,0 +1,168 @@
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from model_bakery import baker
+
+from core.models import User
+from store import booking, models, sms, tasks
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket:
+    def test_allows_a_burst_then_the_rate(self):
+        clock = FakeClock()
+        bucket = sms.TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+
+        for _ in range(3):
+            bucket.take()
+        assert clock.now == 0
+        for _ in range(4):
+            bucket.take()
+
+        assert clock.now == pytest.approx(2)
+
+
+@pytest.mark.django_db
+class TestOutbox:
+    def test_sends_one_sms_per_phone_with_all_its_messages(self):
+        sms.notify('9999999999', 'Your checkup is booked.')
+        sms.notify('8888888888', 'Your report is ready.')
+        sms.notify('9999999999', 'Payment confirmed.')
+
+        assert sms.flush() == 2
+
+        assert sms.outbox == [
+            ('+919999999999', 'Your checkup is booked.\nPayment confirmed.'),
+            ('+918888888888', 'Your report is ready.'),
+        ]
+        assert not models.TextMessage.objects.filter(sent_at=None).exists()
+
+    def test_a_failed_send_leaves_the_rest_in_the_outbox(self, monkeypatch):
+        sms.notify('9999999999', 'Your checkup is booked.')
+        sms.notify('8888888888', 'Your report is ready.')
+        transport = sms.get_transport()
+        send = transport.send
+
+        def fail_for_the_second(phone, body):
+            if phone == '+918888888888':
+                raise ConnectionError
+            send(phone, body)
+        monkeypatch.setattr(transport, 'send', fail_for_the_second)
+
+        with pytest.raises(ConnectionError):
+            sms.flush()
+
+        assert list(models.TextMessage.objects.filter(sent_at=None).values_list('phone', flat=True)) == [
+            '+918888888888'
+        ]
+        monkeypatch.undo()
+        assert sms.flush() == 1
+
+    def test_schedules_one_flush_per_window(self, monkeypatch, django_capture_on_commit_callbacks):
+        scheduled = []
+        monkeypatch.setattr('store.tasks.send_pending_sms.apply_async', lambda **kwargs: scheduled.append(kwargs))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            sms.notify('9999999999', 'Your checkup is booked.')
+            sms.notify('8888888888', 'Your report is ready.')
+
+        assert scheduled == [{'countdown': settings.SMS_BATCH_WINDOW, 'queue': 'sms'}]
+
+    def test_a_rolled_back_message_leaves_the_window_unscheduled(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            with pytest.raises(RuntimeError), transaction.atomic():
+                sms.notify('9999999999', 'Your checkup is booked.')
+                raise RuntimeError
+
+        assert cache.get(sms.SCHEDULED_KEY) is None
+
+    def test_a_task_sends_one_batch_and_queues_another_for_the_rest(self, settings, monkeypatch):
+        settings.SMS_BATCH_SIZE = 1
+        scheduled = []
+        monkeypatch.setattr(tasks.send_pending_sms, 'apply_async', lambda **kwargs: scheduled.append(kwargs))
+        sms.notify('9999999999', 'Your checkup is booked.')
+        sms.notify('8888888888', 'Your report is ready.')
+
+        assert tasks.send_pending_sms() == 1
+        assert scheduled == [{'queue': 'sms'}]
+        assert tasks.send_pending_sms() == 1
+        assert scheduled == [{'queue': 'sms'}]
+        assert len(sms.outbox) == 2
+
+    def test_messages_claimed_by_another_flush_are_not_sent_again(self):
+        sms.notify('9999999999', 'Your checkup is booked.')
+        models.TextMessage.objects.update(claimed_at=timezone.now())
+
+        assert sms.flush() == 0
+        assert sms.outbox == []
+
+    def test_keeps_a_lock_that_another_flush_took_over(self, monkeypatch):
+        sms.notify('9999999999', 'Your checkup is booked.')
+        # the lock expires while this flush sends, and another flush takes it
+        monkeypatch.setattr(sms.get_transport(), 'send', lambda phone, body: cache.set(sms.FLUSH_LOCK_KEY, 'other'))
+
+        sms.flush()
+
+        assert cache.get(sms.FLUSH_LOCK_KEY) == 'other'
+
+
+@pytest.mark.django_db
+class TestEvents:
+    def test_paying_an_order_queues_a_confirmation(self, api_client):
+        user = baker.make(User, phone='9999999999')
+        api_client.force_login(user)
+        order = baker.make(models.Order, user=user, total_amount=300)
+
+        api_client.get(f'/store/orders/{order.id}/payment/')
+        api_client.get(f'/store/orders/{order.id}/payment/')
+
+        assert list(models.TextMessage.objects.values_list('phone', 'body')) == [
+            ('+919999999999', f'Payment of Rs. 300.00 for order #{order.id} is confirmed.')
+        ]
+
+    def test_booking_and_reports_queue_a_notification(self):
+        user = baker.make(User, phone='9999999999')
+        doctor = baker.make(models.Doctor, first_name='Meera', last_name='Rao', fees=500)
+        timing = baker.make(models.Timing, doctor=doctor, day=baker.make(models.Day, name='Monday'))
+        booking.book(user.id, doctor)
+        baker.make(models.Report, user=user, test__title='Lipid Profile')
+
+        bodies = list(models.TextMessage.objects.values_list('body', flat=True))
+        monday = booking.next_timing_date(timing, timezone.localtime())
+        assert bodies[0] == f'Your checkup with Dr. Meera Rao on {monday:%d %b} is booked.'
+        assert bodies[1].startswith('Your Lipid Profile report is ready.')
+
+    def test_users_without_a_phone_get_no_sms(self):
+        baker.make(models.Report, user=baker.make(User, phone=None))
+
+        assert not models.TextMessage.objects.exists()
+
+
+def test_web_workers_do_not_import_twilio():
+    code = (
+        "import django, sys; django.setup(); "
+        "import core.views, store.views, E_Pathology.urls; "
+        "print('twilio' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True, text=True, check=True,
+        env={'DJANGO_SETTINGS_MODULE': 'E_Pathology.test_settings', 'PATH': ''},
+        cwd=settings.BASE_DIR
+    )
+    assert result.stdout.strip() == 'False'
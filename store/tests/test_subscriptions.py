@@ -0,0 +1,79 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from store import models, subscriptions
+
+
+class TestBloomFilter:
+    def test_has_no_false_negatives_and_few_false_positives(self):
+        bloom = subscriptions.BloomFilter(capacity=10000, error_rate=0.01)
+        added = [f'user{index}@example.com' for index in range(10000)]
+        for email in added:
+            bloom.add(email)
+
+        assert all(email in bloom for email in added)
+        false_positives = sum(f'other{index}@example.com' in bloom for index in range(10000))
+        assert false_positives < 300
+
+
+@pytest.mark.django_db
+class TestSubscribe:
+    def test_subscribes_once(self, client):
+        response = client.post('/subscribe', {'name': 'Asha', 'email': 'asha@example.com'})
+        again = client.post('/subscribe', {'name': 'Asha', 'email': 'asha@example.com'})
+
+        assert response.status_code == 302
+        assert 'already Subscribed' in again.content.decode()
+        assert models.Subscribe.objects.filter(email='asha@example.com').count() == 1
+
+    @pytest.mark.parametrize('data', [
+        {'name': '', 'email': 'asha@example.com'},
+        {'name': 'Asha', 'email': ''},
+        {'name': 'Asha', 'email': 'not-an-email'},
+    ])
+    def test_rejects_blank_or_invalid_input(self, client, data):
+        response = client.post('/subscribe', data)
+
+        assert response.status_code == 200
+        assert not models.Subscribe.objects.exists()
+
+    def test_known_email_is_rejected_without_an_insert(self):
+        baker.make(models.Subscribe, email='asha@example.com')
+
+        with CaptureQueriesContext(connection) as context:
+            assert not subscriptions.subscribe('Asha', 'asha@example.com')
+
+        assert not any(query['sql'].startswith('INSERT') for query in context.captured_queries)
+
+    def test_email_subscribed_elsewhere_is_caught_by_the_unique_index(self):
+        subscriptions.known_emails.get()
+        # subscribed through another process, so missing from this filter
+        baker.make(models.Subscribe, email='asha@example.com')
+
+        assert not subscriptions.subscribe('Asha', 'asha@example.com')
+        assert subscriptions.subscribe('Ravi', 'ravi@example.com')
+
+
+@pytest.mark.django_db
+class TestImportSubscribers:
+    def test_adds_new_emails_in_batches_and_skips_the_rest(self, tmp_path, capsys):
+        baker.make(models.Subscribe, email='known@example.com')
+        path = tmp_path / 'subscribers.csv'
+        path.write_text(
+            'name,email\n'
+            'Known,known@example.com\n'
+            'Asha,asha@example.com\n'
+            'Asha again,asha@example.com\n'
+            'Broken,not-an-email\n'
+            'Ravi,ravi@example.com\n'
+        )
+
+        call_command('import_subscribers', str(path), batch_size=2)
+
+        assert 'Read 5 rows: 2 subscribed, 2 already subscribed, 1 invalid' in capsys.readouterr().out
+        assert set(models.Subscribe.objects.values_list('email', flat=True)) == {
+            'known@example.com', 'asha@example.com', 'ravi@example.com'
+        }
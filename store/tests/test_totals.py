@@ -0,0 +1,73 @@
+import io
+
+import pytest
+from django.core.management import call_command, CommandError
+from model_bakery import baker
+
+from core.models import User
+from store import booking, models, totals
+
+
+@pytest.mark.django_db
+class TestStoredTotals:
+    def test_order_follows_its_tests_being_added_changed_and_removed(self):
+        order = baker.make(models.Order)
+        first = baker.make(models.OrderedTest, order=order, unit_price=100, quantity=2)
+        second = baker.make(models.OrderedTest, order=order, unit_price=50, quantity=1)
+        order.refresh_from_db()
+        assert (order.total_amount, order.item_count) == (250, 2)
+
+        first.quantity = 3
+        first.save()
+        second.delete()
+
+        order.refresh_from_db()
+        assert (order.total_amount, order.item_count) == (300, 1)
+
+    def test_booking_a_doctor_updates_the_checkup(self):
+        user = baker.make(User)
+        doctor = baker.make(models.Doctor, fees=500)
+        baker.make(models.Timing, doctor=doctor, day=baker.make(models.Day, name='Monday'))
+
+        booked = booking.book(user.id, doctor)
+
+        checkup = models.Checkup.objects.get(pk=booked.checkup_id)
+        assert (checkup.total_amount, checkup.item_count) == (500, 1)
+        booked.delete()
+        checkup.refresh_from_db()
+        assert (checkup.total_amount, checkup.item_count) == (0, 0)
+
+    def test_checkup_list_reads_the_stored_total(self, api_client, authenticate):
+        user = authenticate()
+        checkup = baker.make(models.Checkup, user=user)
+        baker.make(models.DoctorForCheckup, checkup=checkup, doctor_fees=400, _quantity=2)
+
+        response = api_client.get('/store/checkups/')
+
+        assert '800.00' in response.content.decode()
+
+
+@pytest.mark.django_db
+class TestTotalsCommands:
+    def test_check_finds_stale_totals_and_backfill_fixes_them(self):
+        orders = baker.make(models.Order, _quantity=3)
+        for order in orders:
+            baker.make(models.OrderedTest, order=order, unit_price=100)
+        models.Order.objects.filter(pk=orders[1].pk).update(total_amount=0, item_count=0)
+        models.Checkup.objects.filter(pk=baker.make(models.Checkup).pk).update(item_count=4)
+
+        assert list(totals.inconsistent(models.Order).values_list('pk', flat=True)) == [orders[1].pk]
+        with pytest.raises(CommandError):
+            call_command('check_totals')
+
+        call_command('backfill_totals', chunk_size=2)
+
+        call_command('check_totals')
+        assert models.Order.objects.get(pk=orders[1].pk).total_amount == 100
+
+    def test_seeded_orders_are_consistent(self):
+        call_command('seed_loadtest', collections=1, tests=5, departments=1, doctors=1, patients=2,
+                     orders_per_patient=3, stdout=io.StringIO())
+
+        assert models.Order.objects.count() == 6
+        call_command('check_totals')
@@ -0,0 +1,43 @@
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Checkup, DoctorForCheckup, Order, OrderedTest
+
+# parent -> (item model, the item's foreign key to the parent, the amount of one item)
+ITEMS = {
+    Order: (OrderedTest, 'order', F('unit_price') * F('quantity')),
+    Checkup: (DoctorForCheckup, 'checkup', F('doctor_fees')),
+}
+
+
+def expressions(model):
+    # total_amount and item_count of each parent, computed from its items
+    item_model, parent, amount = ITEMS[model]
+    items = item_model.objects.filter(**{parent: OuterRef('pk')}).order_by().values(parent)
+    return {
+        'total_amount': Coalesce(
+            Subquery(items.annotate(total=Sum(amount)).values('total'), output_field=DecimalField()),
+            Value(0),
+            output_field=DecimalField()
+        ),
+        'item_count': Coalesce(Subquery(items.annotate(count=Count('pk')).values('count')), Value(0)),
+    }
+
+
+def refresh(model, pks):
+    # One UPDATE that recomputes the totals from the items, in the caller's
+    # transaction. Two requests changing items of the same parent can't lose
+    # each other's change, as they would adding deltas read beforehand.
+    return model.objects.filter(pk__in=pks).update(**expressions(model))
+
+
+def inconsistent(model):
+    # the parents whose stored totals differ from their items
+    expected = expressions(model)
+    return model.objects.annotate(
+        expected_total=expected['total_amount'],
+        expected_count=expected['item_count']
+    ).exclude(
+        total_amount=F('expected_total'),
+        item_count=F('expected_count')
+    ).order_by('pk')
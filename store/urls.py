@@ -21,5 +21,5 @@ router.register('reports', views.ReportViewSet, basename='reports')
 
 
 urlpatterns = [
-
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
 ] + router.urls
@@ -1,40 +1,47 @@
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count
-from django.http import HttpRequest, HttpResponse
-from django.shortcuts import render, redirect
+from django.db.models import Count, Prefetch
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.decorators import action
+from rest_framework import status
+from rest_framework.decorators import action, api_view, permission_classes, renderer_classes
 
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.renderers import AdminRenderer, JSONRenderer, TemplateHTMLRenderer
 
-from rest_framework.permissions import IsAuthenticated, AllowAny, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAuthenticatedOrReadOnly, IsAdminUser
 
-from .filters import TestFilter, QueryFilter, OrderFilter, ReviewFilter, DoctorFilter, ReportFilter
+from .exports import export_queryset, stream_reports_zip
+from .filters import TestFilter, QueryFilter, OrderFilter, ReviewFilter, DoctorFilter, ReportFilter, \
+    ReportExportFilter
 from .models import Test, OrderedTest, Doctor, Collection, Order, Checkup, Query, Review, TestImage, Report, Department
-from .mixins import LoginRequiredMixin
-from .pagination import DefaultPagination
+from .mixins import CachedResponseMixin, ConditionalGetMixin, LoginRequiredMixin
+from . import autocomplete as autocomplete_index, availability, metrics, payments, report_cache, schedules
+from .pagination import DefaultPagination, KeysetPagination
 from .permissions import IsAdminOrReadOnly
+from .reports import stream_test_report
+from .search import TestSearchFilter
+from .tasks import reports_queue_depth
 from .serializers import TestSerializer, DoctorSerializer, CollectionSerializer, OrderSerializer, \
     AddOrderedTestSerializer, CheckupSerializer, AddDoctorForCheckupSerializer, \
     AddQuerySerializer, QuerySerializer, ReviewSerializer, AddReviewSerializer, \
-    TestImageSerializer, AddTestImageSerializer, ReportSerializer, DepartmentSerializer
+    TestImageSerializer, AddTestImageSerializer, ReportSerializer, DepartmentSerializer, \
+    DoctorAvailabilitySerializer, CheckoutSerializer
 
 
-class DepartmentViewSet(ModelViewSet):
+class DepartmentViewSet(ConditionalGetMixin, CachedResponseMixin, ModelViewSet):
+    cache_scope = 'departments'
     renderer_classes = [AdminRenderer]
     serializer_class = DepartmentSerializer
     permission_classes = [IsAdminOrReadOnly]
 
     def get_queryset(self):
-        return Department.objects.\
-            annotate(doctors_count=Count('doctor')).\
-            prefetch_related('doctor_set').all()
+        return Department.objects.annotate(doctors_count=Count('doctor')).all()
 
     def destroy(self, request, *args, **kwargs):
         if Doctor.objects.filter(department_id=kwargs['pk']).count() > 0:
@@ -44,15 +51,14 @@ class DepartmentViewSet(ModelViewSet):
         return super(DepartmentViewSet, self).destroy(request, *args, **kwargs)
 
 
-class CollectionViewSet(ModelViewSet):
+class CollectionViewSet(ConditionalGetMixin, CachedResponseMixin, ModelViewSet):
+    cache_scope = 'collections'
     renderer_classes = [AdminRenderer]
     serializer_class = CollectionSerializer
     permission_classes = [IsAdminOrReadOnly]
 
     def get_queryset(self):
-        return Collection.objects.\
-            annotate(tests_count=Count('test')).\
-            prefetch_related('test_set').all()
+        return Collection.objects.annotate(tests_count=Count('test')).all()
 
     def destroy(self, request, *args, **kwargs):
         if Test.objects.filter(collection_id=kwargs['pk']).count() > 0:
@@ -62,14 +68,15 @@ class CollectionViewSet(ModelViewSet):
         return super(CollectionViewSet, self).destroy(request, *args, **kwargs)
 
 
-class TestViewSet(ModelViewSet):
+class TestViewSet(ConditionalGetMixin, CachedResponseMixin, ModelViewSet):
+    last_modified_field = 'last_update'
+    cache_scope = 'tests'
     renderer_classes = [AdminRenderer]
-    queryset = Test.objects.select_related('collection').prefetch_related('images').all()
+    queryset = Test.objects.select_related('collection').all()
     serializer_class = TestSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TestSearchFilter, OrderingFilter]
     pagination_class = DefaultPagination
     filterset_class = TestFilter
-    search_fields = ['title', 'description']
     ordering_fields = ['unit_price']
     permission_classes = [IsAdminOrReadOnly]
 
@@ -87,9 +94,11 @@ class TestViewSet(ModelViewSet):
         return super(TestViewSet, self).destroy(request, *args, **kwargs)
 
 
-class DoctorViewSet(ModelViewSet):
+class DoctorViewSet(ConditionalGetMixin, CachedResponseMixin, ModelViewSet):
+    last_modified_field = 'last_update'
+    cache_scope = 'doctors'
     renderer_classes = [AdminRenderer]
-    queryset = Doctor.objects.select_related('department', 'qualification').prefetch_related('timings').all()
+    queryset = Doctor.objects.select_related('department', 'qualification').all()
     serializer_class = DoctorSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = DoctorFilter
@@ -100,18 +109,27 @@ class DoctorViewSet(ModelViewSet):
             'request': self.request
         }
 
-    @action(detail=True, renderer_classes=[TemplateHTMLRenderer])
-    def schedule(self, request: HttpRequest, **kwargs):
-        doctor = Doctor.objects.get(pk=kwargs['pk'])
-
-        return render(
-            request,
-            'doctor_schedule.html',
-            {
-                'name': doctor.name(),
-                'schedule': doctor.timings.all()
-            }
+    @action(detail=False)
+    def available(self, request: HttpRequest):
+        query = DoctorAvailabilitySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        doctor_ids = availability.available_doctor_ids(
+            query.validated_data['day'],
+            query.validated_data['time'],
+            query.validated_data.get('department')
         )
+        serializer = self.get_serializer(self.get_queryset().filter(pk__in=doctor_ids), many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, renderer_classes=[TemplateHTMLRenderer, JSONRenderer])
+    def schedule(self, request: HttpRequest, **kwargs):
+        schedule = schedules.get(kwargs['pk'])
+        if schedule is None:
+            raise Http404
+        if request.accepted_renderer.format == 'json':
+            return Response(schedule['json'])
+        return HttpResponse(schedule['html'])
 
 
 class OrderViewSet(LoginRequiredMixin, ModelViewSet):
@@ -120,15 +138,18 @@ class OrderViewSet(LoginRequiredMixin, ModelViewSet):
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_class = OrderFilter
     ordering_fields = ['placed_at']
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         return Order.objects.select_related('user').\
-                prefetch_related('tests__test').\
+                prefetch_related('tests__test', Prefetch('reports', Report.objects.only('id', 'order_id', 'test_id'))).\
                 filter(user_id=self.request.user.id).\
-                order_by('-placed_at', '-payment_status')
+                order_by('-placed_at', '-id')
 
     def get_serializer_class(self):
+        if self.action == 'checkout':
+            return CheckoutSerializer
         if self.request.method == 'POST':
             return AddOrderedTestSerializer
         return OrderSerializer
@@ -139,12 +160,27 @@ class OrderViewSet(LoginRequiredMixin, ModelViewSet):
             'user': self.request.user,
         }
 
+    @action(detail=False, methods=['post'], renderer_classes=[JSONRenderer])
+    def checkout(self, request: HttpRequest):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save()
+        order = self.get_queryset().get(pk=order.pk)
+        return Response(
+            OrderSerializer(order, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED
+        )
+
     @action(detail=True, renderer_classes=[TemplateHTMLRenderer])
+    @payments.idempotent
     def payment(self, request: HttpRequest, **kwargs):
-        order = Order.objects.get(pk=kwargs['pk'])
-        order.payment_status = order.PAYMENT_STATUS_COMPLETE
-        order.save()
-        total_payable = order.tests.unit_price
+        orders = Order.objects.filter(pk=kwargs['pk'], user_id=request.user.id)
+        total_payable = get_object_or_404(orders.values_list('total_amount', flat=True))
+        payments.confirm(
+            orders,
+            request.user.phone,
+            f"Payment of Rs. {total_payable} for order #{kwargs['pk']} is confirmed."
+        )
         return render(
             request,
             'order_payment_msg.html',
@@ -159,6 +195,7 @@ class OrderViewSet(LoginRequiredMixin, ModelViewSet):
 class CheckupViewSet(LoginRequiredMixin, ModelViewSet):
     renderer_classes = [AdminRenderer]
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         if self.request.method in ['POST']:
@@ -174,14 +211,18 @@ class CheckupViewSet(LoginRequiredMixin, ModelViewSet):
         return Checkup.objects.select_related('user').\
             prefetch_related('doctors__doctor').\
             filter(user_id=self.request.user.id).\
-            order_by('-booked_at', '-payment_status')
+            order_by('-booked_at', '-id')
 
     @action(detail=True, renderer_classes=[JSONRenderer])
+    @payments.idempotent
     def payment(self, request: HttpRequest, **kwargs):
-        checkup = Checkup.objects.get(pk=kwargs['pk'])
-        checkup.payment_status = checkup.PAYMENT_STATUS_COMPLETE
-        checkup.save()
-        total_payable = sum(item.doctor_fees for item in checkup.doctors.all())
+        checkup = get_object_or_404(Checkup, pk=kwargs['pk'], user_id=request.user.id)
+        total_payable = checkup.total_amount
+        payments.confirm(
+            Checkup.objects.filter(pk=checkup.pk),
+            request.user.phone,
+            f"Payment of Rs. {total_payable} for checkup #{checkup.pk} is confirmed."
+        )
         return render(
             request,
             'checkup_payment_msg.html',
@@ -199,7 +240,8 @@ class QueryViewSet(ModelViewSet):
     http_method_names = ['get', 'post', 'delete']
     filter_backends = [DjangoFilterBackend]
     filterset_class = QueryFilter
-    queryset = Query.objects.all().order_by('-date')
+    queryset = Query.objects.all().order_by('-date', '-id')
+    pagination_class = KeysetPagination
     permission_classes = [AllowAny]
 
     def get_serializer_class(self):
@@ -212,7 +254,8 @@ class ReviewViewSet(ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_class = ReviewFilter
     renderer_classes = [AdminRenderer]
-    queryset = Review.objects.select_related('user', 'test').all().order_by('-date')
+    queryset = Review.objects.select_related('user', 'test').all().order_by('-date', '-id')
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_serializer_context(self):
@@ -250,7 +293,51 @@ class ReportViewSet(LoginRequiredMixin, ModelViewSet):
     serializer_class = ReportSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = ReportFilter
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        return Report.objects.filter(user_id=self.request.user.id).order_by('-date')
+        return Report.objects.select_related('test').\
+            filter(user_id=self.request.user.id).order_by('-date', '-id')
+
+    @action(detail=True)
+    def download(self, request: HttpRequest, **kwargs):
+        report = get_object_or_404(
+            Report.objects.select_related('user', 'test'),
+            pk=kwargs['pk'],
+            user_id=request.user.id
+        )
+        return stream_test_report(report)
+
+    @action(detail=False, permission_classes=[IsAdminUser])
+    def export(self, request: HttpRequest):
+        filterset = ReportExportFilter(request.GET, queryset=Report.objects.all())
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
 
+        file_name = 'reports_{}_{}.zip'.format(
+            filterset.form.cleaned_data['start'],
+            filterset.form.cleaned_data['end']
+        )
+        response = StreamingHttpResponse(
+            stream_reports_zip(export_queryset(filterset)),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{file_name}"'
+        return response
+
+    @action(detail=False, renderer_classes=[JSONRenderer], permission_classes=[IsAdminUser])
+    def render_stats(self, request: HttpRequest):
+        return Response({
+            'queue_depth': reports_queue_depth(),
+            'pending': Report.objects.filter(pdf='').count(),
+            'render': metrics.timings('reports:render'),
+            'cache': report_cache.stats(),
+        })
+
+
+@api_view(['GET'])
+@renderer_classes([JSONRenderer])
+@permission_classes([AllowAny])
+def autocomplete(request):
+    query = request.query_params.get('q', '')
+    return Response({'results': autocomplete_index.search(query)})